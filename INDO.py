@@ -3,6 +3,25 @@ import pandas as pd
 import os
 from datetime import datetime, timedelta
 import plotly.express as px
+from anomalies import Z_LIMIT, anomaly_paths_for, ensure_anomaly_state, read_anomalies, record_anomalies
+from condition_writer import get_writer
+from charts import RENDER_MODES, get_figure, store_figure, trend_chart
+from data_store import CONDITION_COLUMNS, count_rows, file_version, load_condition_data, load_page, has_data
+from downsampling import DEFAULT_POINT_BUDGET, downsample
+from forecast import FORECAST_WINDOW_DAYS, forecast_time_to_limit
+from insights import summarize_recommendations
+from rollups import get_home_kpis
+from rules import load_rules
+from siblings import SIBLING_COLUMNS, SIBLING_WINDOW_DAYS, sibling_comparison
+from vibration import ZONE_COLUMNS, load_machine_classes, zones_for
+from route_entry import INPUT_LIMITS, prepare_route_readings, route_template
+from deviations import (FLEET_HEALTH_DAYS, PERSISTENT_STREAK_READINGS, annotate_streaks, build_threshold_table,
+                        ensure_ledger, fleet_health_for, ledger_path_for, read_ledger, streaks_for)
+
+# Condition database: the CSV file, the directory of a month-partitioned
+# Parquet store created with `python data_store.py migrate-parquet`, or a
+# .db file created with `python data_store.py migrate-sqlite`
+DATA_PATH = "C:/Users/USER/Desktop/condition_data.csv"
 
 # Define deviation thresholds for specific equipment
 equipment_thresholds = ({
@@ -213,51 +232,72 @@ equipment_thresholds = ({
     "2-P-2303-B": {"Driving End Temp": 58, "Driven End Temp": 58, "RMS Velocity (mm/s)": 4.3},
 })
 
+# Threshold lookup table used by the deviation checks
+threshold_table = build_threshold_table(equipment_thresholds)
+
+# Deviation ledger, appended to on every Submit Data
+LEDGER_PATH = ledger_path_for(DATA_PATH)
+
+# Per-equipment moving statistics of the anomaly detector, and the anomalies it found
+ANOMALY_STATE_PATH, ANOMALY_LOG_PATH = anomaly_paths_for(DATA_PATH)
+
+# Recommendation rules: global and per-area limits from the rules file,
+# with equipment_thresholds as the per-equipment limits
+RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rules.json")
+rules = load_rules(RULES_PATH, equipment_limits=equipment_thresholds)
+
+# ISO 10816 machine class per equipment, from the same file
+machine_classes = load_machine_classes(RULES_PATH)
+
+# Widgets of the entry forms. Streamlit drops the state of widgets that are not
+# drawn, so these are carried over while another view of the monitoring page is shown
+ENTRY_KEYS = [
+    "date", "area", "equipment", "is_running", "de_temp", "dr_temp",
+    "vibration_rms_velocity", "vibration_peak_acceleration", "vibration_displacement",
+    "oil_level", "leakage", "abnormal_sound", "gearbox", "gearbox_temp",
+    "gearbox_vibration_rms_velocity", "gearbox_vibration_peak_acceleration",
+    "gearbox_vibration_displacement", "gearbox_oil", "gearbox_leakage",
+    "gearbox_abnormal_sound", "observation", "route_area", "route_date",
+]
+
 # Initialize session state variables
 if "page" not in st.session_state:
     st.session_state.page = "main"  # Set default page to "main"
 
 
 def load_data(file_path):
-    """Load data from a CSV file."""
-    if not os.path.exists(file_path):
+    """Load data from the condition CSV file or Parquet store."""
+    if not has_data(file_path):
         return pd.DataFrame()  # Return an empty DataFrame if file doesn't exist
-    return pd.read_csv(file_path)
+    return load_condition_data(file_path)
 
 # Add Utility Functions Here
 def calculate_kpis(file_path):
-    """Calculate KPIs and return data for charts."""
-    if not os.path.exists(file_path) or os.path.getsize(file_path) == 0:
+    """Format the home-page KPIs; the chart series come from the same rollup summary."""
+    no_data = {
+        "compliance_rate": "No Data",
+        "avg_temp": "No Data",
+        "running_percentage": "No Data",
+        "running_by_area": pd.DataFrame(),  # Empty DataFrames for the tables and charts
+        "avg_temp_trend": pd.DataFrame(),
+        "running_by_date": pd.DataFrame(),
+    }
+    if not has_data(file_path):
         st.warning(f"No data file found at {file_path}. Showing default KPI values.")
-        return {
-            "compliance_rate": "No Data",
-            "avg_temp": "No Data",
-            "running_percentage": "No Data",
-            "data": pd.DataFrame()  # Return an empty DataFrame for charts
-        }
-
-    # Load the CSV file
-    data = pd.read_csv(file_path)
-    if data.empty:
+        return no_data
+
+    # Every KPI and chart series in one summary of the daily per-area rollup,
+    # recomputed only when readings are written
+    kpis = get_home_kpis(file_path)
+    if kpis["running_percentage"] is None:
         st.warning("The data file is empty. Showing default KPI values.")
-        return {
-            "compliance_rate": "No Data",
-            "avg_temp": "No Data",
-            "running_percentage": "No Data",
-            "data": pd.DataFrame()  # Return an empty DataFrame for charts
-        }
-
-    # Calculate KPIs
-    compliance_rate = data["Is Running"].mean() * 100
-    avg_temp = data[["Driving End Temp", "Driven End Temp"]].mean().mean()
-    running_percentage = (data["Is Running"].sum() / len(data)) * 100
-
-    # Return KPIs and data
+        return no_data
+
     return {
-        "compliance_rate": f"{compliance_rate:.2f}%",
-        "avg_temp": f"{avg_temp:.2f}°C",
-        "running_percentage": f"{running_percentage:.2f}%",
-        "data": data
+        **kpis,
+        "compliance_rate": f"{kpis['compliance_rate']:.2f}%",
+        "avg_temp": f"{kpis['avg_temp']:.2f}°C" if kpis["avg_temp"] is not None else "No Data",
+        "running_percentage": f"{kpis['running_percentage']:.2f}%",
     }
 
 
@@ -270,7 +310,7 @@ if "page" not in st.session_state:
 
 if st.session_state.page == "main":
     # Set the file path for the database
-    file_path = "C:/Users/USER/Desktop/condition_data.csv"
+    file_path = DATA_PATH
 
     st.title("INDORAMA PETROCHEMICALS LTD")
     st.subheader("Your Gateway to Enhanced Maintenance Efficiency")
@@ -313,39 +353,20 @@ if st.session_state.page == "main":
     col3.metric("Running Equipment", kpis["running_percentage"])
 
 
-    # Function to check for deviations
-    def check_deviations(data, equipment_thresholds):
-        """
-        Identify equipment with deviations exceeding thresholds.
-        """
-        deviations = []
-        for _, row in data.iterrows():
-            equipment = row["Equipment"]
-            if equipment in equipment_thresholds:
-                thresholds = equipment_thresholds[equipment]
-                if (
-                        row["Driving End Temp"] > thresholds["Driving End Temp"] or
-                        row["Driven End Temp"] > thresholds["Driven End Temp"] or
-                        row["RMS Velocity (mm/s)"] > thresholds["RMS Velocity (mm/s)"]
-                ):
-                    deviations.append(row)
-        return pd.DataFrame(deviations)
-
-
     # Define start and end dates for the weekly period
     start_date = datetime.now() - timedelta(days=7)
     end_date = datetime.now()
 
     # Check if data exists
-    if "data" not in st.session_state:
+    ensure_ledger(file_path, LEDGER_PATH, threshold_table)
+    ensure_anomaly_state(file_path, ANOMALY_STATE_PATH, ANOMALY_LOG_PATH)
+    zone_distributions = {}
+    if not has_data(file_path):
         st.warning("No data found. Please add equipment condition data first.")
     else:
-        data = st.session_state.data  # Load the data from the session state
-        data["Date"] = pd.to_datetime(data["Date"])
-        weekly_data = data[(data["Date"] >= start_date) & (data["Date"] <= end_date)]
-
-        # Check for deviations
-        deviations = check_deviations(weekly_data, equipment_thresholds)
+        # Deviations recorded in the ledger this week, and the streaks of consecutive breaches
+        deviations = read_ledger(LEDGER_PATH, start_date, end_date)
+        streaks, reading_streaks = streaks_for(file_path, threshold_table)
 
         # Display notification section
         if deviations.empty:
@@ -354,8 +375,8 @@ if st.session_state.page == "main":
             st.warning("⚠️ Deviations detected! Review the equipment below:")
             st.dataframe(deviations)
 
-            # Downloadable CSV for deviations
-            csv = deviations.to_csv(index=False)
+            # Downloadable CSV for deviations, with the streak each one belongs to
+            csv = annotate_streaks(deviations, reading_streaks).to_csv(index=False)
             st.download_button(
                 label="Download Deviation Report",
                 data=csv,
@@ -363,45 +384,45 @@ if st.session_state.page == "main":
                 mime="text/csv"
             )
 
+        # Equipment over its limits for several consecutive readings up to this week
+        persistent = streaks[(streaks["End"] >= pd.Timestamp(start_date.date()))
+                             & (streaks["Readings"] >= PERSISTENT_STREAK_READINGS)]
+        if not persistent.empty:
+            st.error(f"🔥 {len(persistent)} equipment have been over their limits for "
+                     f"{PERSISTENT_STREAK_READINGS} or more consecutive readings:")
+            st.dataframe(persistent.sort_values("Readings", ascending=False), hide_index=True)
+
+        # Readings far from the usual behaviour of their equipment
+        anomalies = read_anomalies(ANOMALY_LOG_PATH, start_date, end_date)
+        if not anomalies.empty:
+            st.warning(f"📉 {len(anomalies)} readings this week are unusual for their equipment (|z| > {Z_LIMIT:g}):")
+            st.dataframe(anomalies, hide_index=True)
+
+        # Vibration severity zones (ISO 10816) of every reading, computed once per data version
+        _, zone_changes_by_column, zone_distributions = zones_for(file_path, machine_classes)
+        for reading, zone_column in ZONE_COLUMNS.items():
+            changes = zone_changes_by_column[zone_column]
+            changes = changes[changes["Date"] >= pd.Timestamp(start_date.date())]
+            if not changes.empty:
+                st.warning(f"📈 {reading}: vibration zone worsened this week for {changes['Equipment'].nunique()} equipment.")
+                st.dataframe(changes, hide_index=True)
+
     # Add schedule for weekly notifications
     if datetime.now().weekday() == 4:  # If today is Friday
         st.info("🔔 It's Friday! Time to review the maintenance schedule for equipment with major deviations.")
 
     # Function to detect weekly deviations and generate a report
-    def detect_weekly_deviations(file_path, equipment_thresholds, start_date, end_date):
+    def detect_weekly_deviations(file_path, ledger_path, start_date, end_date):
         """
-        Detect significant deviations for the current week and generate a printable report.
+        Collect the recorded deviations for the selected week and generate a printable report.
         """
-        if not os.path.exists(file_path) or os.path.getsize(file_path) == 0:
+        if not has_data(file_path):
             return pd.DataFrame(), "No data available for analysis."
 
-        data = pd.read_csv(file_path)
-        if data.empty:
-            return pd.DataFrame(), "No data available for analysis."
-
-        # Convert Date column to datetime and filter data
-        data["Date"] = pd.to_datetime(data["Date"], errors="coerce")
-        data = data.dropna(subset=["Date"])  # Drop rows with invalid dates
-        filtered_data = data[(data["Date"] >= pd.to_datetime(start_date)) & (data["Date"] <= pd.to_datetime(end_date))]
-
-        if filtered_data.empty:
-            return pd.DataFrame(), "No significant deviations detected for the selected week."
-
-        deviations = []
-
-        # Check for deviations based on thresholds
-        grouped = filtered_data.groupby("Equipment")
-        for equipment, group in grouped:
-            if equipment in equipment_thresholds:
-                thresholds = equipment_thresholds[equipment]
-                if (
-                        (group["Driving End Temp"] > thresholds["Driving End Temp"]).any()
-                        or (group["Driven End Temp"] > thresholds["Driven End Temp"]).any()
-                        or (group["RMS Velocity (mm/s)"] > thresholds["RMS Velocity (mm/s)"]).any()
-                ):
-                    deviations.append(group)
-
-        deviation_data = pd.concat(deviations) if deviations else pd.DataFrame()
+        # Read the breaches recorded in the deviation ledger for the selected week
+        deviation_data = read_ledger(ledger_path, start_date, end_date)
+        if not deviation_data.empty:
+            deviation_data = deviation_data.sort_values("Equipment", kind="stable")
 
         if deviation_data.empty:
             return pd.DataFrame(), "All equipment is operating within defined thresholds for the week."
@@ -426,7 +447,7 @@ if st.session_state.page == "main":
 
     # Generate report button
     if st.button("Generate Weekly Report with Insights", key="generate_ai_weekly_report_button"):
-        deviation_data, message = detect_weekly_deviations(file_path, equipment_thresholds, start_date, end_date)
+        deviation_data, message = detect_weekly_deviations(file_path, LEDGER_PATH, start_date, end_date)
 
         # Display message
         st.write(message)
@@ -436,123 +457,156 @@ if st.session_state.page == "main":
             st.subheader("Equipment with Major Deviations")
             st.dataframe(deviation_data)
 
+            # Streaks of consecutive breaches that overlap the week
+            streaks, reading_streaks = streaks_for(file_path, threshold_table)
+            week_streaks = streaks[(streaks["Start"] <= pd.Timestamp(end_date))
+                                   & (streaks["End"] >= pd.Timestamp(start_date))]
+            st.subheader("Deviation Streaks")
+            st.dataframe(week_streaks.sort_values("Readings", ascending=False), hide_index=True)
+
             # Downloadable Report
             st.write("#### Download Weekly Report")
-            csv = deviation_data.to_csv(index=False)
+            csv = annotate_streaks(deviation_data, reading_streaks).to_csv(index=False)
             st.download_button("Download Report as CSV", data=csv, file_name="weekly_report.csv", mime="text/csv")
-
-            # AI Insights Based on Weekly Data
-            st.write("## Insights & Recommendations")
-            recommendations = []
-            for _, row in deviation_data.iterrows():
-                equipment = row["Equipment"]
-
-                # Example AI recommendation rules
-                if "Driving End Temp" in deviation_data.columns and row["Driving End Temp"] > equipment_thresholds.get(
-                        equipment, {}).get("Driving End Temp", float('inf')):
-                    recommendations.append(
-                        f"🔧 **{equipment}**: Driving End Temp exceeds threshold. Maintenance recommended.")
-
-                if "Oil Level" in deviation_data.columns and row["Oil Level"] == "Low":
-                    recommendations.append(f"🛢️ **{equipment}**: Oil level is low. Consider refilling.")
-
-                if "RMS Velocity (mm/s)" in deviation_data.columns and row[
-                    "RMS Velocity (mm/s)"] > equipment_thresholds.get(equipment, {}).get("RMS Velocity (mm/s)",
-                                                                                         float('inf')):
-                    recommendations.append(f"📊 **{equipment}**: High vibration detected. Inspect for potential issues.")
-
-            # Display recommendations
-            if recommendations:
-                st.write("### 🔍 Recommendations Based on Weekly Data")
-                for rec in recommendations:
-                    st.info(rec)
-            else:
-                st.success(
-                    "✅ No immediate issues detected in the weekly data. All equipment operating within thresholds.")
         else:
             st.warning("No significant deviations detected for the selected week.")
 
+        # AI Insights Based on Weekly Data
+        st.write("## Insights & Recommendations")
+        week_data = (load_condition_data(file_path, start_date=start_date, end_date=end_date)
+                     if has_data(file_path) else pd.DataFrame())
+        # Rule hits for the whole week, one row per equipment and rule
+        recommendations, rule_timings = summarize_recommendations(week_data, rules)
+
+        # Display recommendations
+        if not recommendations.empty:
+            st.write("### 🔍 Recommendations Based on Weekly Data")
+            st.dataframe(recommendations, hide_index=True)
+        else:
+            st.success(
+                "✅ No immediate issues detected in the weekly data. All equipment operating within thresholds.")
+
+        with st.expander("Rule evaluation timings"):
+            st.dataframe(pd.Series(rule_timings, name="Time (ms)", dtype="float64"))
+
 
-    # Ensure data is available from KPI calculation
-    data = kpis["data"]
+    # Percentage of running equipment per area, from the KPI summary
+    running_percentage_by_area = kpis["running_by_area"]
 
-    if not data.empty:  # Check if the data is available
+    if not running_percentage_by_area.empty:  # Check if the data is available
         st.write("---")
         st.subheader("Running Equipment by Area")
 
-        # Calculate the percentage of running equipment per area
-        if "Area" in data.columns and "Is Running" in data.columns:
-            running_percentage_by_area = (
-                    data.groupby("Area")["Is Running"].mean() * 100
-            ).reset_index()
-            running_percentage_by_area.rename(
-                columns={"Is Running": "Running Percentage (%)"}, inplace=True
-            )
-
-            # Display the table
-            st.table(running_percentage_by_area)
-        else:
-            st.warning("The dataset does not contain 'Area' or 'Is Running' columns.")
+        # Display the table
+        st.table(running_percentage_by_area)
     else:
         st.warning("No data available to calculate running equipment percentages.")
 
+    # Vibration severity zones per area
+    if zone_distributions:
+        st.write("---")
+        st.subheader("Vibration Severity by Area (ISO 10816)")
+        st.caption("Readings per zone. A: new machine, B: unrestricted, C: restricted operation, D: damage risk.")
+        for zone_column, column in zip(ZONE_COLUMNS.values(), st.columns(len(ZONE_COLUMNS))):
+            if zone_column in zone_distributions:
+                column.write(f"**{zone_column}**")
+                column.table(zone_distributions[zone_column])
+
+    # Equipment ranked by how soon its trend reaches its limit
+    if has_data(file_path):
+        forecast = forecast_time_to_limit(file_path, threshold_table)
+        ranking = forecast.dropna(subset=["Days to Limit"]).head(15)
+        st.write("---")
+        st.subheader("Days to Limit")
+        st.caption(f"Straight-line trend of each equipment's last {FORECAST_WINDOW_DAYS} days of readings, "
+                   "projected to its threshold. 0 means the trend is already over the limit.")
+        if ranking.empty:
+            st.success("✅ No equipment is trending towards its limits.")
+        else:
+            st.dataframe(ranking, hide_index=True)
+
+    # Every equipment against the recent days at a glance
+    if has_data(file_path):
+        st.write("---")
+        st.subheader("Fleet Health")
+        st.caption("Worst reading/limit ratio of each equipment per day, from equipment_thresholds. "
+                   "1 is on the limit; blank days have no running reading. Worst equipment first.")
+        fleet_days = st.slider("Days", min_value=7, max_value=180, value=FLEET_HEALTH_DAYS, key="fleet_health_days")
+        figure_key = ("fleet_health", file_version(file_path), fleet_days)
+        fig = get_figure(figure_key)
+        if fig is None:
+            heatmap = fleet_health_for(file_path, threshold_table, fleet_days)
+            fig = px.imshow(
+                heatmap,
+                color_continuous_scale="RdYlGn_r",
+                color_continuous_midpoint=1.0,
+                aspect="auto",
+                labels={"x": "Date", "y": "Equipment", "color": "Reading / Limit"},
+            )
+            fig.update_layout(height=max(400, 12 * len(heatmap)), yaxis_nticks=len(heatmap))
+            store_figure(figure_key, fig)
+        st.plotly_chart(fig)
+
     # Add KPI Charts
-    data = kpis["data"]
-    if not data.empty:  # Check if data is available
+    avg_temp_trend = kpis["avg_temp_trend"]
+    running_equipment_by_area = kpis["running_by_date"]
+    if not running_equipment_by_area.empty:  # Check if data is available
         st.write("---")
         st.subheader("KPI Charts")
 
+        # The KPI figures only change with the data
+        chart_key = ("kpi", file_version(file_path))
+
         import plotly.express as px
 
         # Average Temperature Trend
-        if "Driving End Temp" in data.columns and "Driven End Temp" in data.columns:
-            # Calculate the average temperature
-            data["Avg Temp"] = data[["Driving End Temp", "Driven End Temp"]].mean(axis=1)
-
-            # Aggregate average temperature by date
-            avg_temp_trend = data.groupby("Date", as_index=False)["Avg Temp"].mean()
-
+        if not avg_temp_trend.empty:
             st.write("### Average Temperature Trend")
-
-            # Create a Plotly line chart
-            fig = px.line(
-                avg_temp_trend,
-                x="Date",
-                y="Avg Temp",
-                title="Average Temperature Trend Over Time",
-                labels={"Avg Temp": "Average Temperature (°C)", "Date": "Date"},
-                markers=True,  # Adds markers for each data point
-            )
-
-            # Enhance chart aesthetics
-            fig.update_traces(line=dict(width=2))
-            fig.update_layout(
-                title_font_size=18,
-                xaxis_title_font_size=14,
-                yaxis_title_font_size=14,
-                hovermode="x unified",  # Combine hover info
-            )
-
+            figure_key = chart_key + ("average_temperature",)
+            fig = get_figure(figure_key)
+            if fig is None:
+                # Create a Plotly line chart
+                fig = trend_chart(
+                    avg_temp_trend,
+                    "Date",
+                    "Avg Temp",
+                    title="Average Temperature Trend Over Time",
+                    labels={"Avg Temp": "Average Temperature (°C)", "Date": "Date"},
+                    markers=True,  # Adds markers for each data point
+                )
+
+                # Enhance chart aesthetics
+                fig.update_traces(line=dict(width=2))
+                fig.update_layout(
+                    title_font_size=18,
+                    xaxis_title_font_size=14,
+                    yaxis_title_font_size=14,
+                    hovermode="x unified",  # Combine hover info
+                )
+
+                store_figure(figure_key, fig)
             st.plotly_chart(fig)
         else:
             st.warning("Temperature data (Driving End or Driven End) is missing in the dataset.")
 
 
         # Running Equipment Count
-        if "Is Running" in data.columns and "Area" in data.columns:
-            running_equipment_by_area = data.groupby(["Date", "Area"])["Is Running"].sum().reset_index()
+        if "Is Running" in running_equipment_by_area.columns and "Area" in running_equipment_by_area.columns:
             st.write("### Running Equipment Count by Area")
-
-            # Create the bar chart with Plotly
-            fig = px.bar(
-                running_equipment_by_area,
-                x="Date",
-                y="Is Running",
-                color="Area",
-                title="Running Equipment Count by Area",
-                labels={"Is Running": "Running Equipment Count"},
-            )
-            fig.update_layout(barmode="stack")
+            figure_key = chart_key + ("running_equipment",)
+            fig = get_figure(figure_key)
+            if fig is None:
+                # Create the bar chart with Plotly
+                fig = px.bar(
+                    running_equipment_by_area,
+                    x="Date",
+                    y="Is Running",
+                    color="Area",
+                    title="Running Equipment Count by Area",
+                    labels={"Is Running": "Running Equipment Count"},
+                )
+                fig.update_layout(barmode="stack")
+                store_figure(figure_key, fig)
             st.plotly_chart(fig)
         else:
             st.warning("The dataset does not contain 'Is Running' or 'Area' columns.")
@@ -568,82 +622,92 @@ if st.session_state.page == "main":
 elif st.session_state.page == "monitoring":
 
     def load_data(file_path):
-        """Load data from a CSV file."""
-        if not os.path.exists(file_path):
+        """Load data from the condition CSV file or Parquet store."""
+        if not has_data(file_path):
             return pd.DataFrame()  # Return an empty DataFrame if file doesn't exist
-        return pd.read_csv(file_path)
+        return load_condition_data(file_path)
 
 
-    def filter_data(df, equipment, start_date, end_date):
+    def filter_data(file_path, equipment, start_date, end_date):
         """Filter data by equipment and date range."""
-        df["Date"] = pd.to_datetime(df["Date"])  # Convert Date column to datetime
-        filtered_df = df[
-            (df["Equipment"] == equipment) &
-            (df["Date"] >= pd.to_datetime(start_date)) &
-            (df["Date"] <= pd.to_datetime(end_date))
-            ]
-        return filtered_df
-
-    # Tabs for Condition Monitoring and Report
-    tab1, tab2 = st.tabs(["Condition Monitoring", "Report"])
-
-    with tab1:
-        st.header("Condition Monitoring Data Entry")
+        # Pushed down to the store: an (Equipment, Date) index range scan on SQLite
+        return load_condition_data(file_path, start_date=start_date, end_date=end_date, equipment=equipment)
+
+    # Equipment lists for each area
+    equipment_lists = {
+        "Reaction": [
+            "3-P-101", "3-P-102-A", "3-P-102-B", "3-P-103-A", "3-P-103-B",
+            "3-P-201", "3-P-202", "3-P-203", "3-P-204", "3-P-205", "3-P-206",
+            "3-P-208", "3-P-209", "3-P-301-A", "3-P-301-B", "3-P-301-C",
+            "3-K-101-A", "3-K-101-B", "3-K-301-A", "3-K-301-B", "3-P-301-A",
+            "3-P-301-B", "3-P-301-C", "3-P-302-A", "3-P-302-B", "3-P-302-C",
+            "3-P-303-A", "3-P-303-B", "3-P-304-A", "3-P-304-B", "3-P-305-A",
+            "3-P-305-B", "3-P-306-A", "3-P-306-B", "3-M-301", "3-M-201",
+            "3-M-203", "3-M-205", "3-M-207", "3-M-209", "3-P-401-A", "3-P-401-B", "3-K-102", "3-K-401", "3-K-402"
+        ],
+        "Distillation": [
+            "3-P-901-A", "3-P-901-B", "3-P-902-A", "3-P-902-B", "3-P-903-A",
+            "3-P-903-B", "3-P-903-C", "3-P-904-A", "3-P-904-B", "3-P-905-A",
+            "3-P-905-B", "3-P-906-A", "3-P-906-B", "3-P-907-A", "3-P-907-B",
+            "3-P-909-A", "3-P-909-B", "3-P-910-A", "3-P-910-B", "3-P-911-A",
+            "3-P-911-B", "3-P-912-A", "3-P-912-B", "3-P-914-A", "3-P-914-B",
+            "3-P-916-A", "3-P-916-B", "3-P-917", "3-K-901", "3-K-1001-A",
+            "3-K-1001-B", "3-K-1001-C", "3-P-1001-A", "3-P-1001-B", "3-P-1001-C",
+            "3-P-1001-D", "3-P-1001-E", "3-P-1001-F", "3-P-1011", "3-P-1101-A",
+            "3-P-1101-B", "3-P-920-A", "3-P-920-B", "3-P-1102-A", "3-P-1102-B",
+            "3-P-1121", "3-P-1122", "3-P-1201-A", "3-P-1201-B", "3-P-1202-A",
+            "3-P-1202-B", "3-RUP-901", "3-RUK-901"
+        ],
+        "Finishing": [
+            "3-P-501-A", "3-P-501-B", "3-P-502-A", "3-P-502-B", "3-P-503-A",
+            "3-P-503-B", "3-P-504-A", "3-P-504-B", "3-P-601-A", "3-P-601-B",
+            "3-P-601-C", "3-P-601-D", "3-P-602-A", "3-P-602-B", "3-P-602-C",
+            "3-P-602-D", "3-P-603-A", "3-P-603-B", "3-P-604-A", "3-P-604-B",
+            "3-P-604-C", "3-P-604-D", "3-P-605-1", "3-P-605-2", "3-P-606-1",
+            "3-P-606-2", "3-P-607-1", "3-P-607-2", "3-P-608-1", "3-P-608-2",
+            "3-P-609-1", "3-P-609-2", "3-P-610-1", "3-P-610-2", "3-P-611-1",
+            "3-P-611-2", "3-P-612-1", "3-P-612-2", "3-K-602-A", "3-K-602-B",
+            "3-K-602-C", "3-K-603-1", "3-K-603-2", "3-K-605-A", "3-K-605-B",
+            "3-K-605-C", "3-K-605-D", "3-K-605-E", "3-K-605-F", "3-K-605-G",
+            "3-K-606-A", "3-K-606-B", "3-K-606-C", "3-K-606-D", "3-K-606-E",
+            "3-K-606-F", "3-K-606-G", "3-K-701-A", "3-K-701-B", "3-K-701-C",
+            "3-K-701-D", "3-K-701-E", "3-K-701-F", "3-K-704-A", "3-K-704-B",
+            "3-K-801-A", "3-K-801-B", "3-K-802-A", "3-K-802-B", "3-K-802-C",
+            "3-M-501", "3-M-502", "3-M-503", "3-M-504", "3-M-505"
+        ],
+        "Butene": [
+            "2-P-2101-A", "2-P-2101-B", "2-P-2301-A", "2-P-2301-B",
+            "2-P-2302-A", "2-P-2302-B", "2-P-2306-A", "2-P-2306-B",
+            "2-P-2201-A", "2-P-2201-B", "2-P-2202-A", "2-P-2202-B",
+            "2-P-2203-A", "2-P-2203-B", "2-P-2304-A", "2-P-2304-B",
+            "2-P-2305-A", "2-P-2305-B", "2-P-2401-A", "2-P-2401-B",
+            "2-P-2601-A", "2-P-2601-B", "2-P-2701", "2-P-2501-A",
+            "2-P-2501-B", "2-P-2502-A", "2-P-2502-B", "2-P-2602-A",
+            "2-P-2602-B", "2-P-2303-A", "2-P-2303-B"
+        ]
+    }
 
-        # Equipment lists for each area
-        equipment_lists = {
-            "Reaction": [
-                "3-P-101", "3-P-102-A", "3-P-102-B", "3-P-103-A", "3-P-103-B",
-                "3-P-201", "3-P-202", "3-P-203", "3-P-204", "3-P-205", "3-P-206",
-                "3-P-208", "3-P-209", "3-P-301-A", "3-P-301-B", "3-P-301-C",
-                "3-K-101-A", "3-K-101-B", "3-K-301-A", "3-K-301-B", "3-P-301-A",
-                "3-P-301-B", "3-P-301-C", "3-P-302-A", "3-P-302-B", "3-P-302-C",
-                "3-P-303-A", "3-P-303-B", "3-P-304-A", "3-P-304-B", "3-P-305-A",
-                "3-P-305-B", "3-P-306-A", "3-P-306-B", "3-M-301", "3-M-201",
-                "3-M-203", "3-M-205", "3-M-207", "3-M-209", "3-P-401-A", "3-P-401-B", "3-K-102", "3-K-401", "3-K-402"
-            ],
-            "Distillation": [
-                "3-P-901-A", "3-P-901-B", "3-P-902-A", "3-P-902-B", "3-P-903-A",
-                "3-P-903-B", "3-P-903-C", "3-P-904-A", "3-P-904-B", "3-P-905-A",
-                "3-P-905-B", "3-P-906-A", "3-P-906-B", "3-P-907-A", "3-P-907-B",
-                "3-P-909-A", "3-P-909-B", "3-P-910-A", "3-P-910-B", "3-P-911-A",
-                "3-P-911-B", "3-P-912-A", "3-P-912-B", "3-P-914-A", "3-P-914-B",
-                "3-P-916-A", "3-P-916-B", "3-P-917", "3-K-901", "3-K-1001-A",
-                "3-K-1001-B", "3-K-1001-C", "3-P-1001-A", "3-P-1001-B", "3-P-1001-C",
-                "3-P-1001-D", "3-P-1001-E", "3-P-1001-F", "3-P-1011", "3-P-1101-A",
-                "3-P-1101-B", "3-P-920-A", "3-P-920-B", "3-P-1102-A", "3-P-1102-B",
-                "3-P-1121", "3-P-1122", "3-P-1201-A", "3-P-1201-B", "3-P-1202-A",
-                "3-P-1202-B", "3-RUP-901", "3-RUK-901"
-            ],
-            "Finishing": [
-                "3-P-501-A", "3-P-501-B", "3-P-502-A", "3-P-502-B", "3-P-503-A",
-                "3-P-503-B", "3-P-504-A", "3-P-504-B", "3-P-601-A", "3-P-601-B",
-                "3-P-601-C", "3-P-601-D", "3-P-602-A", "3-P-602-B", "3-P-602-C",
-                "3-P-602-D", "3-P-603-A", "3-P-603-B", "3-P-604-A", "3-P-604-B",
-                "3-P-604-C", "3-P-604-D", "3-P-605-1", "3-P-605-2", "3-P-606-1",
-                "3-P-606-2", "3-P-607-1", "3-P-607-2", "3-P-608-1", "3-P-608-2",
-                "3-P-609-1", "3-P-609-2", "3-P-610-1", "3-P-610-2", "3-P-611-1",
-                "3-P-611-2", "3-P-612-1", "3-P-612-2", "3-K-602-A", "3-K-602-B",
-                "3-K-602-C", "3-K-603-1", "3-K-603-2", "3-K-605-A", "3-K-605-B",
-                "3-K-605-C", "3-K-605-D", "3-K-605-E", "3-K-605-F", "3-K-605-G",
-                "3-K-606-A", "3-K-606-B", "3-K-606-C", "3-K-606-D", "3-K-606-E",
-                "3-K-606-F", "3-K-606-G", "3-K-701-A", "3-K-701-B", "3-K-701-C",
-                "3-K-701-D", "3-K-701-E", "3-K-701-F", "3-K-704-A", "3-K-704-B",
-                "3-K-801-A", "3-K-801-B", "3-K-802-A", "3-K-802-B", "3-K-802-C",
-                "3-M-501", "3-M-502", "3-M-503", "3-M-504", "3-M-505"
-            ],
-            "Butene": [
-                "2-P-2101-A", "2-P-2101-B", "2-P-2301-A", "2-P-2301-B",
-                "2-P-2302-A", "2-P-2302-B", "2-P-2306-A", "2-P-2306-B",
-                "2-P-2201-A", "2-P-2201-B", "2-P-2202-A", "2-P-2202-B",
-                "2-P-2203-A", "2-P-2203-B", "2-P-2304-A", "2-P-2304-B",
-                "2-P-2305-A", "2-P-2305-B", "2-P-2401-A", "2-P-2401-B",
-                "2-P-2601-A", "2-P-2601-B", "2-P-2701", "2-P-2501-A",
-                "2-P-2501-B", "2-P-2502-A", "2-P-2502-B", "2-P-2602-A",
-                "2-P-2602-B", "2-P-2303-A", "2-P-2303-B"
-            ]
-        }
+    # Views of the monitoring page. Unlike st.tabs, which runs every tab on each
+    # rerun, only the selected view runs, so data entry never loads the reports
+    view = st.radio(
+        "View",
+        options=["Condition Monitoring", "Area Route Entry", "Report", "Duty/Standby Sets"],
+        horizontal=True,
+        key="monitoring_view",
+        label_visibility="collapsed",
+    )
 
+    # Keep what was typed into the entry forms while another view is shown
+    for entry_key in ENTRY_KEYS:
+        if entry_key in st.session_state:
+            st.session_state[entry_key] = st.session_state[entry_key]
+
+    # The entry forms are fragments: changing one of their widgets reruns only the
+    # form, not the page, so typing a reading stays fast however large the data grows
+    @st.fragment
+    def condition_entry_form():
+        """Entry form for a single equipment reading."""
+        st.header("Condition Monitoring Data Entry")
 
         # Persistent fields
         date = st.date_input("Date", key="date")
@@ -729,60 +793,171 @@ elif st.session_state.page == "monitoring":
                     "Area": [area],
                     "Equipment": [equipment],
                     "Is Running": [True],
-                    "Driving End Temp": [st.session_state.de_temp],
-                    "Driven End Temp": [st.session_state.dr_temp],
-                    "Oil Level": [st.session_state.oil_level],
-                    "Abnormal Sound": [st.session_state.abnormal_sound],
-                    "Leakage": [st.session_state.leakage],
-                    "Observation": [st.session_state.observation],
-                    "RMS Velocity (mm/s)": [st.session_state.vibration_rms_velocity],
-                    "Peak Acceleration (g)": [st.session_state.vibration_peak_acceleration],
-                    "Displacement (µm)": [st.session_state.vibration_displacement],
-                    "Gearbox Temp": [st.session_state.gearbox_temp if "gearbox_temp" in st.session_state else 0.0],
-                    "Gearbox Oil Level": [st.session_state.gearbox_oil if "gearbox_oil" in st.session_state else "N/A"],
-                    "Gearbox Leakage": [
-                        st.session_state.gearbox_leakage if "gearbox_leakage" in st.session_state else "N/A"],
-                    "Gearbox Abnormal Sound": [
-                        st.session_state.gearbox_leakage if "gearbox_abnormal_sound" in st.session_state else "N/A"]
+                    "Driving End Temp": [de_temp],
+                    "Driven End Temp": [dr_temp],
+                    "Oil Level": [oil_level],
+                    "Abnormal Sound": [abnormal_sound],
+                    "Leakage": [leakage],
+                    "Observation": [observation],
+                    "RMS Velocity (mm/s)": [vibration_rms_velocity],
+                    "Peak Acceleration (g)": [vibration_peak_acceleration],
+                    "Displacement (µm)": [vibration_displacement],
+                    # Gearbox fields only when the gearbox box is ticked in this run; the
+                    # session state can still hold values entered for another equipment
+                    "Gearbox Temp": [gearbox_temp if gearbox else 0.0],
+                    "Gearbox Oil Level": [gearbox_oil if gearbox else "N/A"],
+                    "Gearbox Leakage": [gearbox_leakage if gearbox else "N/A"],
+                    "Gearbox Abnormal Sound": [gearbox_abnormal_sound if gearbox else "N/A"],
+                    "Gearbox RMS Velocity (mm/s)": [gearbox_vibration_rms_velocity if gearbox else 0.0],
+                    "Gearbox Peak Acceleration (g)": [gearbox_vibration_peak_acceleration if gearbox else 0.0],
+                    "Gearbox Displacement (µm)": [gearbox_vibration_displacement if gearbox else 0.0],
                 }
 
-            # Save to CSV
+            # Save to the condition database through the shared, locked writer
             df = pd.DataFrame(data)
-            file_path = "C:/Users/USER/Desktop/condition_data.csv"
+            file_path = DATA_PATH
             if not os.path.exists("data"):
                 os.makedirs("data")
-            if os.path.exists(file_path):
-                df.to_csv(file_path, mode="a", header=False, index=False)
+            try:
+                # The writer records any threshold breach of the reading in the deviation ledger
+                ensure_ledger(file_path, LEDGER_PATH, threshold_table)
+                ensure_anomaly_state(file_path, ANOMALY_STATE_PATH, ANOMALY_LOG_PATH)
+                get_writer(file_path).submit(df, complete=True)
+            except (ValueError, OSError) as e:
+                st.error(f"Data could not be saved: {e}")
             else:
-                df.to_csv(file_path, index=False)
-
-            st.success("Data Submitted Successfully!")
+                # Update the equipment's moving statistics and flag unusual readings
+                for _, anomaly in record_anomalies(ANOMALY_STATE_PATH, ANOMALY_LOG_PATH, df).iterrows():
+                    st.warning(f"📉 {anomaly['Metric']} of {anomaly['Value']:.2f} is unusual for {anomaly['Equipment']} "
+                               f"(expected about {anomaly['Expected']:.2f}, z = {anomaly['Z-Score']:.1f}).")
+
+                st.success("Data Submitted Successfully!")
+
+    if view == "Condition Monitoring":
+        condition_entry_form()
+
+    # Area Route Entry: the whole round of an area in one grid, saved in one write
+    @st.fragment
+    def route_entry_form():
+        """Entry grid for the round of a whole area."""
+        st.header("Area Route Data Entry")
+        route_date = st.date_input("Date", key="route_date")
+        route_area = st.selectbox("Select Area", options=list(equipment_lists.keys()), key="route_area")
+        st.caption("Fill in the round for every equipment of the area, then submit it once. "
+                   "Editing the grid does not reload the page.")
+
+        def number_column(label, column):
+            """Grid column with the same limits as the single-equipment number input."""
+            return st.column_config.NumberColumn(
+                label, min_value=INPUT_LIMITS[column][0], max_value=INPUT_LIMITS[column][1], step=0.1)
+
+        # The round typed so far is kept per area outside the grid's widget state,
+        # which Streamlit drops while another view is shown. The grid starts from
+        # it whenever it is shown again; while it stays on screen its starting
+        # data must not change, or Streamlit would treat it as a new grid.
+        route_drafts = st.session_state.setdefault("route_drafts", {})
+        route_bases = st.session_state.setdefault("route_bases", {})
+        editor_key = f"route_editor_{route_area}"
+        if editor_key not in st.session_state or route_area not in route_bases:
+            route_bases[route_area] = route_drafts.get(route_area, route_template(equipment_lists[route_area]))
+
+        route_grid = st.data_editor(
+            route_bases[route_area],
+            key=editor_key,
+            hide_index=True,
+            num_rows="fixed",
+            disabled=["Equipment"],
+            column_config={
+                "Is Running": st.column_config.CheckboxColumn("Is Running"),
+                "Driving End Temp": number_column("Driving End Temp (°C)", "Driving End Temp"),
+                "Driven End Temp": number_column("Driven End Temp (°C)", "Driven End Temp"),
+                "Oil Level": st.column_config.SelectboxColumn("Oil Level", options=["Normal", "Low", "High"]),
+                "Abnormal Sound": st.column_config.SelectboxColumn("Abnormal Sound", options=["No", "Yes"]),
+                "Leakage": st.column_config.SelectboxColumn("Leakage", options=["No", "Yes"]),
+                "Observation": st.column_config.TextColumn("Observation"),
+                "RMS Velocity (mm/s)": number_column("RMS Velocity (mm/s)", "RMS Velocity (mm/s)"),
+                "Peak Acceleration (g)": number_column("Peak Acceleration (g)", "Peak Acceleration (g)"),
+                "Displacement (µm)": number_column("Displacement (µm)", "Displacement (µm)"),
+                "Gearbox Temp": number_column("Gearbox Temp (°C)", "Gearbox Temp"),
+                "Gearbox Oil Level": st.column_config.SelectboxColumn(
+                    "Gearbox Oil Level", options=["Normal", "Low", "High"]),
+                "Gearbox Leakage": st.column_config.SelectboxColumn("Gearbox Leakage", options=["No", "Yes"]),
+                "Gearbox Abnormal Sound": st.column_config.SelectboxColumn(
+                    "Gearbox Abnormal Sound", options=["No", "Yes"]),
+                "Gearbox RMS Velocity (mm/s)": number_column(
+                    "Gearbox RMS Velocity (mm/s)", "Gearbox RMS Velocity (mm/s)"),
+                "Gearbox Peak Acceleration (g)": number_column(
+                    "Gearbox Peak Acceleration (g)", "Gearbox Peak Acceleration (g)"),
+                "Gearbox Displacement (µm)": number_column(
+                    "Gearbox Displacement (µm)", "Gearbox Displacement (µm)"),
+            },
+        )
+        route_drafts[route_area] = route_grid
+        route_submitted = st.button("Submit Route")
+
+        if route_submitted:
+            # Validate every row at once, then save the whole round in a single write
+            route_readings, problems = prepare_route_readings(route_grid, route_date, route_area)
+            if problems:
+                for problem in problems:
+                    st.error(problem)
+            else:
+                try:
+                    ensure_ledger(DATA_PATH, LEDGER_PATH, threshold_table)
+                    ensure_anomaly_state(DATA_PATH, ANOMALY_STATE_PATH, ANOMALY_LOG_PATH)
+                    get_writer(DATA_PATH).submit(route_readings)
+                except (ValueError, OSError) as e:
+                    st.error(f"Data could not be saved: {e}")
+                else:
+                    anomalies = record_anomalies(ANOMALY_STATE_PATH, ANOMALY_LOG_PATH, route_readings)
+                    if not anomalies.empty:
+                        st.warning(f"📉 Unusual readings for their equipment: {len(anomalies)}")
+                        st.dataframe(anomalies, hide_index=True)
+                    st.success(f"{len(route_readings)} readings for {route_area} submitted successfully!")
 
+    if view == "Area Route Entry":
+        route_entry_form()
 
-    # Tab 2: Reports and Visualizations
-    with (tab2):
+    # Reports and Visualizations
+    if view == "Report":
         st.header("Reports and Visualization")
-        file_path = "C:/Users/USER/Desktop/condition_data.csv"
-
-        # Load data
-        data = load_data(file_path)
+        file_path = DATA_PATH
 
-        if data.empty:
+        if not has_data(file_path):
             st.warning("No data available. Please enter condition monitoring data first.")
         else:
+            # Full Data: one page at a time, sorted and sliced by the store, so a
+            # rerun sends at most one page of rows to the browser
             st.write("### Full Data")
-            st.dataframe(data)
-
-            # Debugging Step: Show columns
-            st.write("### Column Names")
-            st.write(list(data.columns))
-
-            # Check if 'Equipment' column exists
-            if "Equipment" not in data.columns:
+            browse_columns = st.multiselect("Columns", options=CONDITION_COLUMNS, default=CONDITION_COLUMNS,
+                                            key="browse_columns")
+            sort_column, sort_order, page_size_column = st.columns(3)
+            with sort_column:
+                sort_by = st.selectbox("Sort by", options=CONDITION_COLUMNS, key="browse_sort_by")
+            with sort_order:
+                descending = st.radio("Order", options=["Descending", "Ascending"], horizontal=True,
+                                      key="browse_order") == "Descending"
+            with page_size_column:
+                page_size = st.selectbox("Rows per page", options=[25, 50, 100, 250], index=1,
+                                         key="browse_page_size")
+            total_rows = count_rows(file_path)
+            page_count = max(1, -(-total_rows // page_size))
+            page_number = st.number_input("Page", min_value=1, max_value=page_count, value=1, step=1,
+                                          key="browse_page")
+            offset = (page_number - 1) * page_size
+            page = load_page(file_path, offset, page_size, columns=browse_columns or None, sort_by=sort_by,
+                             descending=descending)
+            st.dataframe(page, hide_index=True)
+            st.caption(f"Rows {min(offset + 1, total_rows)}–{min(offset + page_size, total_rows)} "
+                       f"of {total_rows} (page {page_number} of {page_count})")
+
+            # Equipment present in the data, read without loading the other columns
+            equipment_column = load_condition_data(file_path, columns=["Equipment"])
+            if "Equipment" not in equipment_column.columns:
                 st.error("The 'Equipment' column is missing. Please check the data file.")
             else:
                 # Dropdown for Equipment Selection
-                equipment_options = data["Equipment"].unique()
+                equipment_options = equipment_column["Equipment"].dropna().unique()
                 selected_equipment = st.selectbox("Select Equipment", options=equipment_options)
 
                 # Date Range Inputs
@@ -793,7 +968,7 @@ elif st.session_state.page == "monitoring":
                     st.error("Start date cannot be later than end date.")
                 else:
                     # Filter Data
-                    filtered_data = filter_data(data, selected_equipment, start_date, end_date)
+                    filtered_data = filter_data(file_path, selected_equipment, start_date, end_date)
 
                     if filtered_data.empty:
                         st.warning(f"No data found for {selected_equipment} between {start_date} and {end_date}.")
@@ -813,27 +988,62 @@ elif st.session_state.page == "monitoring":
 
                         # Select appropriate dataset based on user choice
                         if data_option == "General Table (All Data)":
-                            visualization_data = data  # Use the full dataset
+                            visualization_data = load_data(file_path)  # Use the full dataset
                             st.write("Using data from the general table (all records).")
                         else:
                             visualization_data = filtered_data  # Use the filtered dataset
                             st.write("Using data from the filtered table.")
 
+                        # Trend charts are thinned to a point budget per trace before plotting
+                        budget_column, method_column, render_column = st.columns(3)
+                        with budget_column:
+                            point_budget = st.number_input("Points per trace", min_value=100, max_value=20000,
+                                                           value=DEFAULT_POINT_BUDGET, step=100,
+                                                           key="chart_point_budget")
+                        with method_column:
+                            downsampling_method = st.radio(
+                                "Downsampling",
+                                options=["lttb", "minmax"],
+                                format_func={"lttb": "Trend shape (LTTB)", "minmax": "Min/max envelope"}.get,
+                                horizontal=True,
+                                key="chart_downsampling",
+                            )
+                        with render_column:
+                            # auto switches to WebGL traces for large charts
+                            render_mode = st.radio("Rendering", options=list(RENDER_MODES), horizontal=True,
+                                                   format_func={"auto": "Auto", "svg": "SVG", "webgl": "WebGL"}.get,
+                                                   key="chart_render_mode")
+
+                        # Figures are cached per data version, dataset, equipment, date range and chart settings
+                        if data_option == "General Table (All Data)":
+                            chart_scope = (data_option, None, None, None)
+                        else:
+                            chart_scope = (data_option, selected_equipment, start_date, end_date)
+                        chart_key = ("report", *chart_scope, file_version(file_path), point_budget,
+                                     downsampling_method, render_mode)
+
                         # Driving and Driven End Temperature Trend
                         if "Driving End Temp" in visualization_data.columns and "Driven End Temp" in visualization_data.columns:
                             st.write("#### Driving and Driven End Temperature Trend for Equipment")
-                            temp_chart_data = visualization_data[["Date", "Driving End Temp", "Driven End Temp"]].melt(
-                                id_vars="Date",
-                                var_name="Temperature Type",
-                                value_name="Temperature")
-                            fig = px.line(
-                                temp_chart_data,
-                                x="Date",
-                                y="Temperature",
-                                color="Temperature Type",
-                                title="Driving and Driven End Temperature Trend",
-                                labels={"Temperature": "Temperature (°C)"}
-                            )
+                            figure_key = chart_key + ("temperature",)
+                            fig = get_figure(figure_key)
+                            if fig is None:
+                                temp_chart_data = visualization_data[["Date", "Driving End Temp", "Driven End Temp"]].melt(
+                                    id_vars="Date",
+                                    var_name="Temperature Type",
+                                    value_name="Temperature")
+                                temp_chart_data = downsample(temp_chart_data, "Date", "Temperature", by="Temperature Type",
+                                                             budget=point_budget, method=downsampling_method)
+                                fig = trend_chart(
+                                    temp_chart_data,
+                                    "Date",
+                                    "Temperature",
+                                    render_mode=render_mode,
+                                    color="Temperature Type",
+                                    title="Driving and Driven End Temperature Trend",
+                                    labels={"Temperature": "Temperature (°C)"}
+                                )
+                                store_figure(figure_key, fig)
                             st.plotly_chart(fig)
                         else:
                             st.warning(
@@ -842,19 +1052,27 @@ elif st.session_state.page == "monitoring":
                         # Equipment Vibration Trend
                         if "RMS Velocity (mm/s)" in visualization_data.columns and "Peak Acceleration (g)" in visualization_data.columns and "Displacement (µm)" in visualization_data.columns:
                             st.write("#### Vibration Trend for Equipment")
-                            vibration_chart_data = visualization_data[
-                                ["Date", "RMS Velocity (mm/s)", "Peak Acceleration (g)", "Displacement (µm)"]].melt(
-                                id_vars="Date",
-                                var_name="Vibration Type",
-                                value_name="Value")
-                            fig = px.line(
-                                vibration_chart_data,
-                                x="Date",
-                                y="Value",
-                                color="Vibration Type",
-                                title="Vibration Trend for Equipment",
-                                labels={"Value": "Value"}
-                            )
+                            figure_key = chart_key + ("vibration",)
+                            fig = get_figure(figure_key)
+                            if fig is None:
+                                vibration_chart_data = visualization_data[
+                                    ["Date", "RMS Velocity (mm/s)", "Peak Acceleration (g)", "Displacement (µm)"]].melt(
+                                    id_vars="Date",
+                                    var_name="Vibration Type",
+                                    value_name="Value")
+                                vibration_chart_data = downsample(vibration_chart_data, "Date", "Value",
+                                                                  by="Vibration Type", budget=point_budget,
+                                                                  method=downsampling_method)
+                                fig = trend_chart(
+                                    vibration_chart_data,
+                                    "Date",
+                                    "Value",
+                                    render_mode=render_mode,
+                                    color="Vibration Type",
+                                    title="Vibration Trend for Equipment",
+                                    labels={"Value": "Value"}
+                                )
+                                store_figure(figure_key, fig)
                             st.plotly_chart(fig)
                         else:
                             st.warning("Vibration data is missing in the selected dataset.")
@@ -862,13 +1080,21 @@ elif st.session_state.page == "monitoring":
                         # Driving and Driven End Temperature Trend for Gearbox
                         if "Gearbox Temp" in visualization_data.columns:
                             st.write("#### Gearbox Temperature Trend")
-                            fig = px.line(
-                                visualization_data,
-                                x="Date",
-                                y="Gearbox Temp",
-                                title="Gearbox Temperature Trend",
-                                labels={"Gearbox Temp": "Temperature (°C)"}
-                            )
+                            figure_key = chart_key + ("gearbox_temperature",)
+                            fig = get_figure(figure_key)
+                            if fig is None:
+                                gearbox_temp_chart_data = downsample(visualization_data[["Date", "Gearbox Temp"]], "Date",
+                                                                     "Gearbox Temp", budget=point_budget,
+                                                                     method=downsampling_method)
+                                fig = trend_chart(
+                                    gearbox_temp_chart_data,
+                                    "Date",
+                                    "Gearbox Temp",
+                                    render_mode=render_mode,
+                                    title="Gearbox Temperature Trend",
+                                    labels={"Gearbox Temp": "Temperature (°C)"}
+                                )
+                                store_figure(figure_key, fig)
                             st.plotly_chart(fig)
                         else:
                             st.warning("Gearbox Temperature data is missing in the selected dataset.")
@@ -876,19 +1102,27 @@ elif st.session_state.page == "monitoring":
                         # Equipment Vibration Trend for Gearbox
                         if "Gearbox RMS Velocity (mm/s)" in visualization_data.columns and "Gearbox Peak Acceleration (g)" in visualization_data.columns and "Gearbox Displacement (µm)" in visualization_data.columns:
                             st.write("#### Vibration Trend for Gearbox")
-                            gearbox_vibration_chart_data = visualization_data[
-                                ["Date", "Gearbox RMS Velocity (mm/s)", "Gearbox Peak Acceleration (g)",
-                                 "Gearbox Displacement (µm)"]].melt(id_vars="Date",
-                                                                    var_name="Vibration Type",
-                                                                    value_name="Value")
-                            fig = px.line(
-                                gearbox_vibration_chart_data,
-                                x="Date",
-                                y="Value",
-                                color="Vibration Type",
-                                title="Vibration Trend for Gearbox",
-                                labels={"Value": "Value"}
-                            )
+                            figure_key = chart_key + ("gearbox_vibration",)
+                            fig = get_figure(figure_key)
+                            if fig is None:
+                                gearbox_vibration_chart_data = visualization_data[
+                                    ["Date", "Gearbox RMS Velocity (mm/s)", "Gearbox Peak Acceleration (g)",
+                                     "Gearbox Displacement (µm)"]].melt(id_vars="Date",
+                                                                        var_name="Vibration Type",
+                                                                        value_name="Value")
+                                gearbox_vibration_chart_data = downsample(gearbox_vibration_chart_data, "Date", "Value",
+                                                                          by="Vibration Type", budget=point_budget,
+                                                                          method=downsampling_method)
+                                fig = trend_chart(
+                                    gearbox_vibration_chart_data,
+                                    "Date",
+                                    "Value",
+                                    render_mode=render_mode,
+                                    color="Vibration Type",
+                                    title="Vibration Trend for Gearbox",
+                                    labels={"Value": "Value"}
+                                )
+                                store_figure(figure_key, fig)
                             st.plotly_chart(fig)
                         else:
                             st.warning("Gearbox Vibration data is missing in the selected dataset.")
@@ -925,6 +1159,31 @@ elif st.session_state.page == "monitoring":
                         else:
                             st.warning("Gearbox Oil Level data is missing in the selected dataset.")
 
+    # Duty/standby sets: every unit side by side with its siblings
+    if view == "Duty/Standby Sets":
+        st.header("Duty/Standby Set Comparison")
+        st.caption(f"Averages while running over the last {SIBLING_WINDOW_DAYS} days of readings. "
+                   "\"vs Siblings\" is the gap to the average of the other units of the set.")
+        if not has_data(DATA_PATH):
+            st.warning("No data available. Please enter condition monitoring data first.")
+        else:
+            comparison = sibling_comparison(load_condition_data(DATA_PATH, columns=SIBLING_COLUMNS))
+            if comparison.empty:
+                st.info("No equipment sets with more than one unit in the data.")
+            else:
+                drifting = comparison[comparison["Drifting"] != ""]
+                if drifting.empty:
+                    st.success("✅ No unit is drifting from its siblings.")
+                else:
+                    st.warning(f"⚠️ {len(drifting)} units are drifting from their siblings:")
+                    st.dataframe(drifting, hide_index=True)
+
+                equipment_set = st.selectbox("Equipment Set", ["All Sets"] + sorted(comparison["Set"].unique()),
+                                             key="sibling_set")
+                if equipment_set != "All Sets":
+                    comparison = comparison[comparison["Set"] == equipment_set]
+                st.dataframe(comparison, hide_index=True)
+
     # Add Back Button
     if st.button("Back to Home"):
         st.session_state.page = "main"
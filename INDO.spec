@@ -5,7 +5,7 @@ a = Analysis(
     ['INDO.py'],
     pathex=[],
     binaries=[],
-    datas=[],
+    datas=[('rules.json', '.')],
     hiddenimports=[],
     hookspath=[],
     hooksconfig={},
@@ -0,0 +1,212 @@
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from condition_writer import ensure_under_lock, file_lock, get_writer, rewrite_readings
+from data_store import has_data, load_condition_data, running_mask, sidecar_path
+
+# Readings followed by the anomaly detector
+ANOMALY_METRICS = [
+    "Driving End Temp", "Driven End Temp", "RMS Velocity (mm/s)", "Peak Acceleration (g)",
+    "Displacement (µm)", "Gearbox Temp", "Gearbox RMS Velocity (mm/s)"
+]
+
+# Weight of the newest reading in the moving mean and variance
+EWMA_ALPHA = 0.1
+
+# Readings further than this many standard deviations from the mean are anomalies
+Z_LIMIT = 3.0
+
+# Readings an equipment needs before its statistics are trusted
+WARMUP_READINGS = 10
+
+# Layout of the anomaly log
+ANOMALY_COLUMNS = ["Date", "Area", "Equipment", "Metric", "Value", "Expected", "Std Dev", "Z-Score"]
+
+# Per-equipment state: moving mean, moving variance and number of readings of each metric
+STATE_COLUMNS = [f"{metric} {stat}" for metric in ANOMALY_METRICS for stat in ("Mean", "Var", "Count")]
+
+
+def anomaly_paths_for(data_path):
+    """Locations of the detector state and the anomaly log kept next to the condition data.
+
+    The log follows the ledger: a SQLite database when the condition data is one, a CSV file otherwise.
+    """
+    return sidecar_path(data_path, "anomaly_state", ".csv"), sidecar_path(data_path, "anomalies")
+
+
+def _running_values(readings):
+    values = readings.reindex(columns=ANOMALY_METRICS).apply(pd.to_numeric, errors="coerce").astype("float64")
+    values[~running_mask(readings)] = np.nan
+    return values
+
+
+def _anomaly_rows(readings, metric, flagged, values, means, stds, scores):
+    rows = readings.loc[flagged, ["Date", "Area", "Equipment"]].copy()
+    rows["Metric"] = metric
+    rows["Value"] = values[flagged]
+    rows["Expected"] = means[flagged]
+    rows["Std Dev"] = stds[flagged]
+    rows["Z-Score"] = scores[flagged]
+    return rows
+
+
+def _anomaly_frame(parts):
+    if not parts:
+        return pd.DataFrame(columns=ANOMALY_COLUMNS)
+    return pd.concat(parts, ignore_index=True).sort_values(["Date", "Equipment"], kind="stable", ignore_index=True)
+
+
+def backfill_state(data):
+    """Compute the detector state and every anomaly from the full history.
+
+    Uses grouped exponentially weighted means and variances, equivalent to
+    feeding the readings of each equipment through update_state in date order.
+    """
+    data = data.sort_values(["Equipment", "Date"], kind="stable", ignore_index=True)
+    equipment = data["Equipment"]
+    values = _running_values(data)
+    state = pd.DataFrame(index=pd.Index(equipment.dropna().unique(), name="Equipment"), columns=STATE_COLUMNS,
+                         dtype="float64")
+    parts = []
+    for metric in ANOMALY_METRICS:
+        series = values[metric]
+        ewm = series.groupby(equipment, observed=True).ewm(alpha=EWMA_ALPHA, adjust=False, ignore_na=True)
+        means = ewm.mean().droplevel(0).reindex(data.index)
+        variances = ewm.var(bias=True).droplevel(0).reindex(data.index)
+        counts = series.notna().groupby(equipment, observed=True).cumsum()
+
+        # Score each reading against the statistics before it
+        grouped_means = means.groupby(equipment, observed=True)
+        prior_means = grouped_means.shift()
+        prior_stds = np.sqrt(variances.groupby(equipment, observed=True).shift())
+        prior_counts = counts - series.notna()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scores = (series - prior_means) / prior_stds.where(prior_stds > 0)
+        flagged = (scores.abs() > Z_LIMIT) & (prior_counts >= WARMUP_READINGS)
+        if flagged.any():
+            parts.append(_anomaly_rows(data, metric, flagged, series, prior_means, prior_stds, scores))
+
+        state[f"{metric} Mean"] = grouped_means.last()
+        state[f"{metric} Var"] = variances.groupby(equipment, observed=True).last()
+        state[f"{metric} Count"] = counts.groupby(equipment, observed=True).last()
+    state = state.fillna({f"{metric} Count": 0 for metric in ANOMALY_METRICS})
+    return state, _anomaly_frame(parts)
+
+
+def update_state(state, readings):
+    """Fold new readings into the detector state, one equipment update per reading.
+
+    Each reading is scored against the statistics before it; returns the new
+    state and the anomalies found.
+    """
+    values = _running_values(readings).to_numpy()
+    equipment_names = list(state.index)
+    positions = {name: row for row, name in enumerate(equipment_names)}
+    metrics = len(ANOMALY_METRICS)
+    table = state.reindex(columns=STATE_COLUMNS).to_numpy(dtype="float64").reshape(len(state), metrics, 3)
+    table = list(table)
+
+    dates = readings["Date"].to_numpy()
+    areas = readings["Area"].to_numpy()
+    anomalies = []
+    for position, equipment in enumerate(readings["Equipment"]):
+        x = values[position]
+        if equipment not in positions:
+            positions[equipment] = len(equipment_names)
+            equipment_names.append(equipment)
+            table.append(np.column_stack([np.full(metrics, np.nan), np.full(metrics, np.nan), np.zeros(metrics)]))
+        row = table[positions[equipment]]
+        mean, variance, count = row[:, 0], row[:, 1], row[:, 2]
+
+        present = ~np.isnan(x)
+        std = np.sqrt(variance)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scores = np.where(std > 0, (x - mean) / std, np.nan)
+        flagged = present & (count >= WARMUP_READINGS) & (np.abs(scores) > Z_LIMIT)
+        for index in np.flatnonzero(flagged):
+            anomalies.append([dates[position], areas[position], equipment, ANOMALY_METRICS[index], x[index],
+                              mean[index], std[index], scores[index]])
+
+        # West's incremental update of the exponentially weighted mean and variance
+        first = present & (count == 0)
+        difference = x - mean
+        increment = EWMA_ALPHA * difference
+        new_mean = np.where(first, x, mean + increment)
+        new_variance = np.where(first, 0.0, (1 - EWMA_ALPHA) * (variance + difference * increment))
+        row[:, 0] = np.where(present, new_mean, mean)
+        row[:, 1] = np.where(present, new_variance, variance)
+        row[:, 2] = count + present
+
+    table = np.array(table).reshape(len(equipment_names), metrics * 3) if table else np.empty((0, metrics * 3))
+    state = pd.DataFrame(table, index=pd.Index(equipment_names, name="Equipment"), columns=STATE_COLUMNS)
+    return state, _anomaly_frame([pd.DataFrame(anomalies, columns=ANOMALY_COLUMNS)] if anomalies else [])
+
+
+def load_state(state_path):
+    """Read the detector state, or an empty state if there is none yet."""
+    if not os.path.exists(state_path):
+        return pd.DataFrame(columns=STATE_COLUMNS, index=pd.Index([], name="Equipment"), dtype="float64")
+    return pd.read_csv(state_path, index_col="Equipment").reindex(columns=STATE_COLUMNS).astype("float64")
+
+
+def save_state(state_path, state):
+    """Replace the detector state file in one step, so readers never see half a file."""
+    temporary = state_path + ".tmp"
+    state.to_csv(temporary)
+    os.replace(temporary, state_path)
+
+
+def _write_anomalies(data_path, state_path, log_path):
+    state, anomalies = backfill_state(load_condition_data(data_path))
+    with file_lock(state_path):
+        save_state(state_path, state)
+        rewrite_readings(log_path, anomalies.reindex(columns=ANOMALY_COLUMNS))
+    return state, anomalies
+
+
+def rebuild_anomalies(data_path, state_path, log_path):
+    """Recompute the detector state and the anomaly log from the full condition history."""
+    with file_lock(data_path):
+        return _write_anomalies(data_path, state_path, log_path)
+
+
+def ensure_anomaly_state(data_path, state_path, log_path):
+    """Backfill the detector state once if it does not exist yet."""
+    ensure_under_lock(data_path, lambda: os.path.exists(state_path),
+                      lambda: _write_anomalies(data_path, state_path, log_path))
+
+
+def record_anomalies(state_path, log_path, readings):
+    """Update the detector state with newly written readings and log any anomaly."""
+    with file_lock(state_path):
+        state, anomalies = update_state(load_state(state_path), readings)
+        save_state(state_path, state)
+    if not anomalies.empty:
+        get_writer(log_path, ANOMALY_COLUMNS).submit(anomalies)
+    return anomalies
+
+
+def read_anomalies(log_path, start_date=None, end_date=None):
+    """Load the logged anomalies, optionally limited to an inclusive date range."""
+    if not has_data(log_path):
+        return pd.DataFrame(columns=ANOMALY_COLUMNS)
+    anomalies = load_condition_data(log_path, start_date=start_date, end_date=end_date)
+    numeric = ["Value", "Expected", "Std Dev", "Z-Score"]
+    anomalies[numeric] = anomalies[numeric].apply(pd.to_numeric, errors="coerce")
+    return anomalies
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill the anomaly detector state from the condition history.")
+    parser.add_argument("data_path", help="Condition CSV file, Parquet store or SQLite database")
+    args = parser.parse_args()
+    state_path, log_path = anomaly_paths_for(args.data_path)
+    started = time.perf_counter()
+    state, anomalies = rebuild_anomalies(args.data_path, state_path, log_path)
+    print(f"{len(state)} equipment, {len(anomalies)} anomalies in {time.perf_counter() - started:.2f} s")
+    print(f"State: {state_path}")
+    print(f"Log: {log_path}")
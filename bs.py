@@ -3,6 +3,11 @@ import streamlit as st
 import pandas as pd
 import os
 from datetime import datetime
+from data_store import load_condition_data
+from rules import evaluate_rules, load_rules
+
+# Global recommendation rules, shared with the main app
+rules = load_rules(os.path.join(os.path.dirname(os.path.abspath(__file__)), "rules.json"))
 
 # Add Utility Functions Here
 def calculate_kpis(file_path):
@@ -17,7 +22,7 @@ def calculate_kpis(file_path):
         }
 
     # Load the CSV file
-    data = pd.read_csv(file_path)
+    data = load_condition_data(file_path)
     if data.empty:
         st.warning("The data file is empty. Showing default KPI values.")
         return {
@@ -43,16 +48,11 @@ def calculate_kpis(file_path):
 def generate_recommendations(file_path):
     if not os.path.exists(file_path) or os.path.getsize(file_path) == 0:
         return ["No data available for recommendations."]
-    data = pd.read_csv(file_path)
+    data = load_condition_data(file_path)
     if data.empty:
         return ["No data available for recommendations."]
-    recommendations = []
-    if (data["Driving End Temp"] > 80).any():
-        recommendations.append("Investigate high driving end temperature.")
-    if (data["RMS Velocity (mm/s)"] > 5).any():
-        recommendations.append("Check equipment with high vibration levels.")
-    if (data["Oil Level"] == "Low").any():
-        recommendations.append("Refill oil for equipment with low levels.")
+    hits, _ = evaluate_rules(data, rules)
+    recommendations = [rule["message"] for rule in rules if hits[rule["name"]].any()]
     if not recommendations:
         recommendations.append("All equipment is operating within normal parameters.")
     return recommendations
@@ -60,7 +60,7 @@ def generate_recommendations(file_path):
 def compliance_summary(file_path):
     if not os.path.exists(file_path) or os.path.getsize(file_path) == 0:
         return {"safety_check": "No Data", "oil_level_compliance": "No Data"}
-    data = pd.read_csv(file_path)
+    data = load_condition_data(file_path)
     if data.empty:
         return {"safety_check": "No Data", "oil_level_compliance": "No Data"}
     safety_check = (data["Abnormal Sound"] == "No").mean() * 100
@@ -111,7 +111,6 @@ if st.session_state.page == "main":
 
         # Compliance Rate Trend
         if "Date" in data.columns and "Is Running" in data.columns:
-            data["Date"] = pd.to_datetime(data["Date"])  # Ensure Date is datetime
             compliance_trend = data.groupby("Date")["Is Running"].mean() * 100
             st.write("### Compliance Rate Trend")
             st.line_chart(compliance_trend)
@@ -156,12 +155,11 @@ elif st.session_state.page == "monitoring":
         """Load data from a CSV file."""
         if not os.path.exists(file_path):
             return pd.DataFrame()  # Return an empty DataFrame if file doesn't exist
-        return pd.read_csv(file_path)
+        return load_condition_data(file_path)
 
 
     def filter_data(df, equipment, start_date, end_date):
         """Filter data by equipment and date range."""
-        df["Date"] = pd.to_datetime(df["Date"])  # Convert Date column to datetime
         filtered_df = df[
             (df["Equipment"] == equipment) &
             (df["Date"] >= pd.to_datetime(start_date)) &
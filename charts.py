@@ -0,0 +1,123 @@
+import argparse
+import collections
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.io as pio
+
+# Charts with more points than this are drawn with WebGL when the render mode is "auto";
+# SVG traces slow the browser down sharply past about ten thousand points
+WEBGL_POINT_THRESHOLD = 10000
+
+# auto: SVG for small charts and WebGL above WEBGL_POINT_THRESHOLD; svg and webgl force one
+RENDER_MODES = ("auto", "svg", "webgl")
+
+# Chart sizes, in points, timed by the benchmark
+BENCHMARK_POINTS = (10_000, 100_000, 1_000_000)
+
+# Characters of figure JSON the figure cache holds before evicting the least recently used
+FIGURE_CACHE_BYTES = 64 * 1024 * 1024
+
+# Serialized figures shared by every session of the Streamlit process, least recently used first
+_figures = collections.OrderedDict()
+_figures_lock = threading.Lock()
+_figures_bytes = 0
+
+
+def resolve_render_mode(points, render_mode="auto", threshold=WEBGL_POINT_THRESHOLD):
+    """Pick "svg" or "webgl" for a chart of `points` points."""
+    if render_mode not in RENDER_MODES:
+        raise ValueError(f"Unknown render mode: {render_mode}")
+    if render_mode != "auto":
+        return render_mode
+    return "webgl" if points > threshold else "svg"
+
+
+def trend_chart(data, x, y, render_mode="auto", **options):
+    """px.line of a trend, drawn with Scattergl traces when the chart is large.
+
+    `options` are passed on to px.line (color, title, labels, markers, ...).
+    """
+    return px.line(data, x=x, y=y, render_mode=resolve_render_mode(len(data), render_mode), **options)
+
+
+def get_figure(key):
+    """Return the cached figure for `key`, or None if it is not cached.
+
+    Keys name the view, the selection (equipment, date range, settings) and
+    the data version, so a new reading never returns a stale figure.
+    """
+    with _figures_lock:
+        payload = _figures.get(key)
+        if payload is None:
+            return None
+        _figures.move_to_end(key)
+    return pio.from_json(payload)
+
+
+def store_figure(key, fig, max_bytes=FIGURE_CACHE_BYTES):
+    """Cache the JSON of a figure, evicting the least recently used figures past `max_bytes`."""
+    global _figures_bytes
+    payload = fig.to_json()
+    if len(payload) > max_bytes:
+        return
+    with _figures_lock:
+        previous = _figures.pop(key, None)
+        if previous is not None:
+            _figures_bytes -= len(previous)
+        _figures[key] = payload
+        _figures_bytes += len(payload)
+        while _figures_bytes > max_bytes:
+            _, evicted = _figures.popitem(last=False)
+            _figures_bytes -= len(evicted)
+
+
+def clear_figures():
+    """Drop every cached figure."""
+    global _figures_bytes
+    with _figures_lock:
+        _figures.clear()
+        _figures_bytes = 0
+
+
+def benchmark(sizes=BENCHMARK_POINTS, traces=3):
+    """Time building and serializing a trend chart of each size with SVG and WebGL traces.
+
+    Returns one row per size and render mode with the build and to_json
+    times in milliseconds and the size of the figure JSON.
+    """
+    rows = []
+    # The first figure pays for Plotly's lazy imports; keep it out of the timings
+    trend_chart(pd.DataFrame({"Date": [0, 1], "Value": [0, 1]}), "Date", "Value").to_json()
+    for points in sizes:
+        positions = np.arange(points)
+        data = pd.DataFrame({
+            "Date": pd.Timestamp("2023-01-01") + pd.to_timedelta(positions // traces, unit="min"),
+            "Value": np.random.default_rng(0).normal(3.0, 0.5, points).astype("float32"),
+            "Vibration Type": "Trace " + pd.Series(positions % traces + 1).astype("str"),
+        })
+        for render_mode in ("svg", "webgl"):
+            started = time.perf_counter()
+            fig = trend_chart(data, "Date", "Value", render_mode=render_mode, color="Vibration Type")
+            built = time.perf_counter()
+            payload = fig.to_json()
+            serialized = time.perf_counter()
+            rows.append({
+                "Points": len(data),
+                "Render Mode": render_mode,
+                "Build (ms)": (built - started) * 1000,
+                "Serialize (ms)": (serialized - built) * 1000,
+                "JSON (MB)": len(payload) / 1e6,
+            })
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark building and serializing SVG and WebGL trend charts.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(BENCHMARK_POINTS), help="Points per chart")
+    parser.add_argument("--traces", type=int, default=3)
+    args = parser.parse_args()
+    print(benchmark(args.sizes, args.traces).to_string(index=False, float_format="{:.1f}".format))
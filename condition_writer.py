@@ -0,0 +1,258 @@
+import argparse
+import collections
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+import pandas as pd
+
+from data_store import (CONDITION_COLUMNS, append_readings, file_version, has_data, is_parquet_store,
+                        is_sqlite_store)
+
+# One writer per data file, shared by every session of the Streamlit process
+_writers = {}
+_writers_lock = threading.Lock()
+
+
+@contextmanager
+def file_lock(file_path):
+    """Hold an exclusive inter-process lock on `<file_path>.lock` while appending."""
+    lock_path = file_path.rstrip("/\\") + ".lock"
+    with open(lock_path, "a+b") as handle:
+        if os.name == "nt":
+            import msvcrt
+            handle.seek(0)
+            while True:
+                try:
+                    # LK_LOCK retries for about 10 seconds before giving up
+                    msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+            try:
+                yield
+            finally:
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+
+def ensure_under_lock(data_path, is_current, rebuild):
+    """Call rebuild() under the data file's lock unless is_current() holds.
+
+    For state derived from the condition data, such as the deviation ledger
+    and the anomaly detector. Holding the lock means no reading is written
+    between rebuild's scan of the data and its rewrite of the state.
+    is_current() is checked again once the lock is held, since another
+    session may have rebuilt the state while this one waited.
+    """
+    if not has_data(data_path) or is_current():
+        return
+    with file_lock(data_path):
+        if not is_current():
+            rebuild()
+
+
+def rewrite_readings(file_path, data):
+    """Replace the content of a data file with `data`, under the file's lock."""
+    with file_lock(file_path):
+        if is_parquet_store(file_path):
+            shutil.rmtree(file_path)
+        elif os.path.exists(file_path):
+            os.remove(file_path)
+        append_readings(file_path, data)
+
+
+def validate_readings(data, columns=CONDITION_COLUMNS, complete=False):
+    """Check submitted readings against the schema and return them in file column order.
+
+    Unknown columns are rejected. Columns the submission left out are written
+    empty, unless `complete` is set, in which case every column is required.
+    """
+    unknown = [column for column in data.columns if column not in columns]
+    if unknown:
+        raise ValueError(f"Unknown columns in submission: {', '.join(unknown)}")
+    missing = [column for column in columns if column not in data.columns]
+    if complete and missing:
+        raise ValueError(f"Missing columns in submission: {', '.join(missing)}")
+    for required in ("Date", "Area", "Equipment"):
+        if required in columns and (required not in data.columns or data[required].isna().any()):
+            raise ValueError(f"Every reading needs a value for '{required}'.")
+    return data.reindex(columns=columns)
+
+
+class ConditionWriter:
+    """Queue submissions and append them to a data file in batches.
+
+    Submissions are validated by the submitting thread. A background thread
+    appends everything queued while the previous batch was being written as
+    one batch under a file lock, with a single fsync per batch, so batches
+    grow with the number of concurrent submitters. `max_wait` optionally
+    holds a batch open a little longer. `submit` blocks until its batch is
+    on disk. Listeners are called with each written batch and the file
+    version before and after it, while the file lock is still held.
+    """
+
+    def __init__(self, file_path, columns=CONDITION_COLUMNS, max_batch=256, max_wait=0.0):
+        self.file_path = file_path
+        self.columns = list(columns)
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._latencies = collections.deque(maxlen=10000)
+        self._submissions = 0
+        self._rows = 0
+        self._batches = 0
+        self._started = None
+        self._finished = None
+        self._listeners = {}
+        self._thread = threading.Thread(target=self._run, name=f"writer:{file_path}", daemon=True)
+        self._thread.start()
+
+    def submit(self, data, wait=True, timeout=None, complete=False):
+        """Queue readings for appending; by default wait until they are written.
+
+        `complete` requires every column of the file, see validate_readings.
+        """
+        future = Future()
+        self._queue.put((validate_readings(data, self.columns, complete), time.perf_counter(), future))
+        if wait:
+            future.result(timeout)
+        return future
+
+    def add_listener(self, name, listener):
+        """Register `listener(batch, version_before, version_after)`, replacing any of the same name."""
+        with self._stats_lock:
+            self._listeners[name] = listener
+
+    def _run(self):
+        while True:
+            pending = [self._queue.get()]
+            deadline = time.perf_counter() + self.max_wait
+            while len(pending) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                try:
+                    if remaining > 0:
+                        pending.append(self._queue.get(timeout=remaining))
+                    else:
+                        pending.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._write_batch(pending)
+
+    def _write_batch(self, pending):
+        batch = pd.concat([data for data, _, _ in pending], ignore_index=True)
+        try:
+            with file_lock(self.file_path):
+                version_before = file_version(self.file_path)
+                self._append(batch)
+                version_after = file_version(self.file_path)
+                with self._stats_lock:
+                    listeners = list(self._listeners.values())
+                for listener in listeners:
+                    listener(batch, version_before, version_after)
+        except Exception as error:
+            for _, _, future in pending:
+                future.set_exception(error)
+            return
+
+        finished = time.perf_counter()
+        with self._stats_lock:
+            if self._started is None:
+                self._started = min(queued for _, queued, _ in pending)
+            self._submissions += len(pending)
+            self._rows += len(batch)
+            self._batches += 1
+            self._finished = finished
+            self._latencies.extend(finished - queued for _, queued, _ in pending)
+        for _, _, future in pending:
+            future.set_result(len(batch))
+
+    def _append(self, batch):
+        if is_parquet_store(self.file_path) or is_sqlite_store(self.file_path):
+            append_readings(self.file_path, batch)
+            return
+        write_header = not os.path.exists(self.file_path) or os.path.getsize(self.file_path) == 0
+        payload = batch.to_csv(index=False, header=write_header).encode("utf-8")
+        with open(self.file_path, "ab") as handle:
+            handle.write(payload)
+            handle.flush()
+            os.fsync(handle.fileno())
+
+    def stats(self):
+        """Throughput and latency of the submissions written so far.
+
+        Throughput is measured from the first submission to the end of the last
+        batch written, so time the writer spends idle does not lower it.
+        """
+        with self._stats_lock:
+            latencies = sorted(self._latencies)
+            elapsed = self._finished - self._started if self._started is not None else 0.0
+            stats = {
+                "submissions": self._submissions,
+                "rows": self._rows,
+                "batches": self._batches,
+                "rows_per_second": self._rows / elapsed if elapsed > 0 else 0.0,
+            }
+        for name, quantile in (("p50_ms", 0.5), ("p95_ms", 0.95), ("max_ms", 1.0)):
+            index = min(len(latencies) - 1, int(quantile * len(latencies)))
+            stats[name] = latencies[index] * 1000 if latencies else 0.0
+        return stats
+
+
+def get_writer(file_path, columns=CONDITION_COLUMNS):
+    """Return the process-wide writer for a data file, starting it on first use."""
+    key = os.path.abspath(file_path)
+    with _writers_lock:
+        writer = _writers.get(key)
+        if writer is None:
+            writer = _writers[key] = ConditionWriter(file_path, columns)
+        return writer
+
+
+def benchmark(submitters=32, submissions=50):
+    """Append from many concurrent submitters to a scratch CSV and report the writer stats."""
+    reading = pd.DataFrame([{
+        "Date": "2024-01-01", "Area": "Reaction", "Equipment": "3-P-101", "Is Running": True,
+        "Driving End Temp": 55.0, "Driven End Temp": 54.0, "Oil Level": "Normal",
+        "Abnormal Sound": "No", "Leakage": "No", "Observation": "Benchmark",
+        "RMS Velocity (mm/s)": 2.1, "Peak Acceleration (g)": 1.1, "Displacement (µm)": 170.0,
+    }])
+    with tempfile.TemporaryDirectory() as scratch:
+        file_path = os.path.join(scratch, "condition_data.csv")
+        writer = ConditionWriter(file_path)
+
+        def submitter():
+            for _ in range(submissions):
+                writer.submit(reading)
+
+        threads = [threading.Thread(target=submitter) for _ in range(submitters)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        stats = writer.stats()
+        stats["file_rows"] = len(pd.read_csv(file_path))
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the batched condition data writer.")
+    parser.add_argument("--submitters", type=int, default=32)
+    parser.add_argument("--submissions", type=int, default=50, help="Submissions per submitter")
+    args = parser.parse_args()
+    for name, value in benchmark(args.submitters, args.submissions).items():
+        print(f"{name}: {value:.2f}" if isinstance(value, float) else f"{name}: {value}")
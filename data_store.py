@@ -0,0 +1,719 @@
+import argparse
+import collections
+import io
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+# Column layout of the condition database, in file order
+CONDITION_COLUMNS = [
+    "Date", "Area", "Equipment", "Is Running", "Driving End Temp",
+    "Driven End Temp", "Oil Level", "Abnormal Sound", "Leakage",
+    "Observation", "RMS Velocity (mm/s)", "Peak Acceleration (g)",
+    "Displacement (µm)", "Gearbox Temp", "Gearbox Oil Level",
+    "Gearbox Leakage", "Gearbox Abnormal Sound", "Gearbox RMS Velocity (mm/s)",
+    "Gearbox Peak Acceleration (g)", "Gearbox Displacement (µm)"
+]
+
+# Sensor readings, held as float32
+NUMERIC_COLUMNS = [
+    "Driving End Temp", "Driven End Temp", "RMS Velocity (mm/s)",
+    "Peak Acceleration (g)", "Displacement (µm)", "Gearbox Temp",
+    "Gearbox RMS Velocity (mm/s)", "Gearbox Peak Acceleration (g)",
+    "Gearbox Displacement (µm)"
+]
+
+# Coded columns with a handful of distinct values, held as categoricals
+CATEGORICAL_COLUMNS = [
+    "Area", "Equipment", "Oil Level", "Abnormal Sound", "Leakage",
+    "Gearbox Oil Level", "Gearbox Leakage", "Gearbox Abnormal Sound"
+]
+
+# Parse-time dtypes for the CSV reader; Date and Is Running are converted once afterwards
+CSV_DTYPES = {
+    **{column: "category" for column in CATEGORICAL_COLUMNS},
+    **{column: "float32" for column in NUMERIC_COLUMNS},
+}
+
+# Partition column of the Parquet store (hive layout: <store>/Month=2023-01/...)
+PARTITION_COLUMN = "Month"
+
+# A month partition holding more files than this is rewritten as one file
+COMPACT_FILES = 16
+
+# File extensions that select the SQLite backend, and the table holding the readings
+SQLITE_EXTENSIONS = (".db", ".sqlite", ".sqlite3")
+SQLITE_TABLE = "readings"
+
+# Process-wide cache of parsed condition data, least recently used first.
+# Streamlit re-executes the page script on every rerun but keeps imported
+# modules alive, so every session served by the same process shares this cache.
+_cache = collections.OrderedDict()
+_cache_lock = threading.Lock()
+_MAX_CACHE_ENTRIES = 32
+
+# One lock per cache key, held while that file or selection is read, so a slow
+# parse blocks only the callers waiting for the same data
+_load_locks = {}
+
+# Bytes remembered from just before the ingested end of a CSV, to detect rewrites
+_SIGNATURE_BYTES = 256
+
+# Parquet files of each store: store -> (directory mtimes, files, total bytes)
+_listings = {}
+_listings_lock = threading.Lock()
+_LISTING_SETTLE_NS = 1_000_000_000
+
+# Results derived from a data file: (path, name, key) -> (file version, result)
+_derived = {}
+_derived_lock = threading.Lock()
+
+
+def is_parquet_store(path):
+    """A directory path is a month-partitioned Parquet store; anything else is a CSV file."""
+    return os.path.isdir(path)
+
+
+def is_sqlite_store(path):
+    """A path with a SQLite extension (.db, .sqlite, .sqlite3) is an indexed SQLite database."""
+    return os.path.splitext(path)[1].lower() in SQLITE_EXTENSIONS
+
+
+def _store_listing(store_dir):
+    """Return (directory mtimes, files, total bytes) of a store, walking it only after a change.
+
+    Store files are never modified in place: writes and compaction add new
+    files and remove old ones, which changes the mtime of the partition
+    directory. Checking a store therefore costs one stat per month rather
+    than one per file.
+    """
+    stamps = [(store_dir, os.stat(store_dir).st_mtime_ns)]
+    with os.scandir(store_dir) as entries:
+        stamps.extend((entry.path, entry.stat().st_mtime_ns) for entry in entries if entry.is_dir())
+    stamps = tuple(sorted(stamps))
+    with _listings_lock:
+        cached = _listings.get(store_dir)
+    if cached is not None and cached[0] == stamps:
+        return cached
+
+    files, size = [], 0
+    for root, _, names in os.walk(store_dir):
+        for name in names:
+            if not name.endswith(".parquet"):
+                continue
+            path = os.path.join(root, name)
+            try:
+                size += os.path.getsize(path)
+            except OSError:
+                # Removed by a compaction since the walk; the next check sees the new mtime
+                continue
+            files.append(path)
+    listing = (stamps, sorted(files), size)
+    # Directory mtimes have coarse ticks; a listing taken within a second of a
+    # change could miss a file added in the same tick, so it is not kept
+    if time.time_ns() - max(mtime for _, mtime in stamps) > _LISTING_SETTLE_NS:
+        with _listings_lock:
+            _listings[store_dir] = listing
+    return listing
+
+
+def _store_files(store_dir):
+    """List every Parquet file of a store."""
+    return _store_listing(store_dir)[1]
+
+
+def file_version(file_path):
+    """Return the identity of a data file or store, or None if it is missing.
+
+    For a CSV file this is (path, size, mtime); for a Parquet store it is the
+    total size of its files, the latest directory mtime and the file count.
+    """
+    if is_parquet_store(file_path):
+        stamps, files, size = _store_listing(file_path)
+        return (
+            os.path.abspath(file_path),
+            size,
+            max(mtime for _, mtime in stamps),
+            len(files),
+        )
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+
+
+def sidecar_path(data_path, name, extension=None):
+    """Location of a file kept next to the condition data, e.g. <stem>_<name>.csv.
+
+    Without an `extension` the sidecar follows the data's backend: a SQLite
+    database when the condition data is one, and a CSV file otherwise.
+    """
+    stem, data_extension = os.path.splitext(data_path.rstrip("/\\"))
+    if extension is None:
+        extension = data_extension if is_sqlite_store(data_path) else ".csv"
+    return stem + "_" + name + extension
+
+
+def has_data(file_path):
+    """Check whether a CSV file or Parquet store exists and is not empty."""
+    version = file_version(file_path)
+    return version is not None and version[1] > 0
+
+
+def _to_running(values):
+    """Convert an Is Running column read as bool, 0/1 or "True"/"False" text to bool."""
+    if pd.api.types.is_bool_dtype(values):
+        return values.astype(bool)
+    if pd.api.types.is_numeric_dtype(values):
+        return values.fillna(0).astype(bool)
+    return values.astype(str).str.strip().str.lower().isin(["true", "1"])
+
+
+def running_mask(data):
+    """Boolean array of the readings taken while the equipment was running.
+
+    Readings of equipment that was not running are recorded as zeros, so
+    analyses leave them out. Every row counts as running without an Is
+    Running column.
+    """
+    if "Is Running" not in data.columns:
+        return np.ones(len(data), dtype=bool)
+    return data["Is Running"].astype("boolean").fillna(False).to_numpy(dtype=bool)
+
+
+def apply_schema(data):
+    """Bring condition data to the canonical in-memory schema.
+
+    Coded columns become categoricals, sensor readings float32, Is Running a
+    bool and Date a parsed datetime; rows with an unreadable date are dropped.
+    Columns outside the schema are left untouched.
+    """
+    data = data.copy(deep=False)
+    if "Date" in data.columns:
+        if not pd.api.types.is_datetime64_any_dtype(data["Date"]):
+            data["Date"] = pd.to_datetime(data["Date"], errors="coerce")
+        data = data.dropna(subset=["Date"])
+    if "Is Running" in data.columns:
+        data["Is Running"] = _to_running(data["Is Running"])
+    for column in NUMERIC_COLUMNS:
+        if column in data.columns and data[column].dtype != "float32":
+            data[column] = pd.to_numeric(data[column], errors="coerce").astype("float32")
+    for column in CATEGORICAL_COLUMNS:
+        if column in data.columns and not isinstance(data[column].dtype, pd.CategoricalDtype):
+            data[column] = data[column].astype("category")
+    return data.reset_index(drop=True)
+
+
+def read_condition_csv(file_path):
+    """Parse a condition CSV straight into the canonical schema."""
+    return apply_schema(pd.read_csv(file_path, dtype=CSV_DTYPES))
+
+
+def _parse_csv_bytes(raw):
+    return apply_schema(pd.read_csv(io.BytesIO(raw), dtype=CSV_DTYPES))
+
+
+def _concat_readings(data, rows):
+    """Concatenate typed frames, merging the categories of the coded columns.
+
+    New categories are appended after the existing ones, so the codes of the
+    rows already loaded stay valid.
+    """
+    data = data.copy(deep=False)
+    rows = rows.copy(deep=False)
+    for column in CATEGORICAL_COLUMNS:
+        if column in data.columns and column in rows.columns:
+            categories = data[column].cat.categories
+            added = rows[column].cat.categories.difference(categories)
+            if len(added):
+                categories = categories.append(added)
+                data[column] = data[column].cat.set_categories(categories)
+            rows[column] = rows[column].cat.set_categories(categories)
+    return pd.concat([data, rows], ignore_index=True)
+
+
+def _read_csv_full(file_path):
+    """Parse a whole CSV up to its last complete line and remember how far it was ingested.
+
+    Returns the frame and the tail state (offset, header, signature) used by
+    _read_csv_tail on the next refresh.
+    """
+    with open(file_path, "rb") as handle:
+        raw = handle.read()
+    # Readers do not take the writer's lock: stop at the last complete line, as
+    # _read_csv_tail does, and leave a partially written row for the next refresh
+    complete = raw.rfind(b"\n") + 1
+    if complete:
+        raw = raw[:complete]
+    header = raw[:raw.find(b"\n") + 1]
+    return _parse_csv_bytes(raw), (len(raw), header, raw[-_SIGNATURE_BYTES:])
+
+
+def _read_csv_tail(file_path, size, data, state):
+    """Parse only the lines appended since the last load and add them to `data`.
+
+    Returns None when the file was truncated or rewritten (its size shrank,
+    or its header or the bytes before the ingested offset changed), in which
+    case it has to be read again from the start. A partially written last
+    line is left for the next refresh.
+    """
+    offset, header, signature = state
+    if size < offset:
+        return None
+    with open(file_path, "rb") as handle:
+        if handle.read(len(header)) != header:
+            return None
+        handle.seek(offset - len(signature))
+        if handle.read(len(signature)) != signature:
+            return None
+        tail = handle.read()
+
+    complete = tail.rfind(b"\n") + 1
+    if complete == 0:
+        return data, state
+    rows = _parse_csv_bytes(header + tail[:complete])
+    signature = (signature + tail[:complete])[-_SIGNATURE_BYTES:]
+    return _concat_readings(data, rows), (offset + complete, header, signature)
+
+
+def _apply_types(data):
+    """Coerce raw readings to the typed layout stored in Parquet.
+
+    Categoricals are stored as plain strings (Parquet dictionary-encodes them
+    anyway) so that files written at different times always merge.
+    """
+    data = apply_schema(data.reindex(columns=CONDITION_COLUMNS))
+    for column in CONDITION_COLUMNS:
+        if column not in NUMERIC_COLUMNS and column not in ("Date", "Is Running"):
+            data[column] = data[column].astype("string")
+    return data
+
+
+def _date_bounds(start_date, end_date):
+    start = pd.to_datetime(start_date) if start_date is not None else None
+    end = pd.to_datetime(end_date) if end_date is not None else None
+    return start, end
+
+
+def _day_range(start_date, end_date):
+    """Widen an inclusive datetime range to whole days.
+
+    Readings are dated by day, so callers passing datetime.now() bounds share
+    the selection read for that day instead of caching one per rerun.
+    """
+    start, end = _date_bounds(start_date, end_date)
+    if start is not None:
+        start = start.normalize()
+    if end is not None:
+        end = end.normalize() + pd.Timedelta(days=1) - pd.Timedelta(1, unit="ns")
+    return start, end
+
+
+def _select(data, columns, start_date, end_date, equipment):
+    """Project and filter an in-memory frame the way the Parquet and SQLite readers do."""
+    start, end = _date_bounds(start_date, end_date)
+    if equipment is not None:
+        data = data[data["Equipment"] == equipment]
+    if start is not None or end is not None:
+        dates = data["Date"]
+        mask = pd.Series(True, index=data.index)
+        if start is not None:
+            mask &= dates >= start
+        if end is not None:
+            mask &= dates <= end
+        data = data[mask]
+    if columns is not None:
+        data = data[[column for column in columns if column in data.columns]]
+    return data
+
+
+def _read_parquet_store(store_dir, columns, start_date, end_date, equipment):
+    """Read only the month partitions and columns a view needs."""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        raise ImportError("Reading the Parquet store requires pyarrow: pip install pyarrow")
+
+    if not _store_files(store_dir):
+        return pd.DataFrame()
+
+    start, end = _date_bounds(start_date, end_date)
+    filters = []
+    if start is not None:
+        filters += [(PARTITION_COLUMN, ">=", start.strftime("%Y-%m")), ("Date", ">=", start)]
+    if end is not None:
+        filters += [(PARTITION_COLUMN, "<=", end.strftime("%Y-%m")), ("Date", "<=", end)]
+    if equipment is not None:
+        filters.append(("Equipment", "==", equipment))
+
+    if columns is not None:
+        columns = [column for column in CONDITION_COLUMNS if column in columns]
+    data = pd.read_parquet(store_dir, columns=columns, filters=filters or None)
+    return data.drop(columns=[PARTITION_COLUMN], errors="ignore")
+
+
+def _sqlite_type(column):
+    if column == "Is Running":
+        return "INTEGER"
+    if column in NUMERIC_COLUMNS:
+        return "REAL"
+    return "TEXT"
+
+
+def _quote(column):
+    return '"' + column.replace('"', '""') + '"'
+
+
+def _sqlite_day_bounds(start_date, end_date):
+    """Translate an inclusive datetime range into bounds on the stored YYYY-MM-DD text."""
+    start, end = _date_bounds(start_date, end_date)
+    if start is not None and start != start.normalize():
+        start = start.normalize() + pd.Timedelta(days=1)
+    return (
+        start.strftime("%Y-%m-%d") if start is not None else None,
+        end.strftime("%Y-%m-%d") if end is not None else None,
+    )
+
+
+def _ensure_sqlite_table(connection, columns):
+    """Create the readings table and its (Equipment, Date) and Date indexes if missing."""
+    definition = ", ".join(f"{_quote(column)} {_sqlite_type(column)}" for column in columns)
+    connection.execute(f"CREATE TABLE IF NOT EXISTS {SQLITE_TABLE} ({definition})")
+    connection.execute(
+        f'CREATE INDEX IF NOT EXISTS idx_{SQLITE_TABLE}_equipment_date ON {SQLITE_TABLE} ("Equipment", "Date")'
+    )
+    connection.execute(f'CREATE INDEX IF NOT EXISTS idx_{SQLITE_TABLE}_date ON {SQLITE_TABLE} ("Date")')
+
+
+def _read_sqlite_store(db_path, columns, start_date, end_date, equipment):
+    """Query the readings table; an equipment and date range becomes an index range scan."""
+    connection = sqlite3.connect(db_path)
+    try:
+        stored = [row[1] for row in connection.execute(f"PRAGMA table_info({SQLITE_TABLE})")]
+        if not stored:
+            return pd.DataFrame()
+        selected = stored if columns is None else [column for column in stored if column in columns]
+
+        clauses, params = [], []
+        if equipment is not None:
+            clauses.append('"Equipment" = ?')
+            params.append(equipment)
+        start, end = _sqlite_day_bounds(start_date, end_date)
+        if start is not None:
+            clauses.append('"Date" >= ?')
+            params.append(start)
+        if end is not None:
+            clauses.append('"Date" <= ?')
+            params.append(end)
+
+        query = f"SELECT {', '.join(_quote(column) for column in selected)} FROM {SQLITE_TABLE}"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        data = pd.read_sql_query(query, connection, params=params)
+    finally:
+        connection.close()
+
+    return data
+
+
+def write_sqlite_readings(data, db_path):
+    """Append readings to the SQLite readings table in one transaction."""
+    data = data.copy()
+    data["Date"] = pd.to_datetime(data["Date"], errors="coerce").dt.strftime("%Y-%m-%d")
+    connection = sqlite3.connect(db_path)
+    try:
+        with connection:
+            _ensure_sqlite_table(connection, list(data.columns))
+            data.to_sql(SQLITE_TABLE, connection, if_exists="append", index=False)
+    finally:
+        connection.close()
+    return len(data)
+
+
+def load_condition_data(file_path, columns=None, start_date=None, end_date=None, equipment=None):
+    """Load condition data, re-reading it only when the file or store has changed.
+
+    A CSV that has only grown since the last load is refreshed by parsing the
+    appended lines alone.
+
+    `columns`, the inclusive `start_date`/`end_date` range and `equipment`
+    narrow the result. For a Parquet store they are pushed down so that only
+    the matching month partitions and column chunks are read; for a SQLite
+    database they become a query on the (Equipment, Date) index.
+
+    Every backend returns the canonical schema of apply_schema. The loaded frame
+    is shared between callers, so a shallow copy is returned to keep column
+    assignments in one view from leaking into the others.
+
+    Parquet and SQLite selections are cached per whole day of their date
+    range and trimmed to the exact bounds afterwards; the least recently used
+    entries are evicted first.
+    """
+    version = file_version(file_path)
+    if version is None or version[1] == 0:
+        return pd.DataFrame()
+
+    parquet = is_parquet_store(file_path)
+    sqlite = is_sqlite_store(file_path)
+    day_start, day_end = _day_range(start_date, end_date)
+    trim = (day_start, day_end) != _date_bounds(start_date, end_date)
+    read_columns = columns
+    if trim and columns is not None and "Date" not in columns:
+        read_columns = list(columns) + ["Date"]
+    if parquet or sqlite:
+        key = (version[0], tuple(read_columns) if read_columns is not None else None,
+               str(day_start.date()) if day_start is not None else None,
+               str(day_end.date()) if day_end is not None else None, equipment)
+    else:
+        key = (version[0],)
+
+    with _cache_lock:
+        load_lock = _load_locks.setdefault(key, threading.Lock())
+    with load_lock:
+        with _cache_lock:
+            cached = _cache.get(key)
+            if cached is not None:
+                _cache.move_to_end(key)
+        if cached is not None and cached[0] == version:
+            data = cached[1]
+        else:
+            state = None
+            if parquet:
+                data = apply_schema(_read_parquet_store(file_path, read_columns, day_start, day_end, equipment))
+            elif sqlite:
+                data = apply_schema(_read_sqlite_store(file_path, read_columns, day_start, day_end, equipment))
+            else:
+                # The CSV only grows by appends: parse just the new tail when possible
+                refreshed = None
+                if cached is not None:
+                    refreshed = _read_csv_tail(file_path, version[1], cached[1], cached[2])
+                data, state = refreshed if refreshed is not None else _read_csv_full(file_path)
+            with _cache_lock:
+                _cache[key] = (version, data, state)
+                _cache.move_to_end(key)
+                while len(_cache) > _MAX_CACHE_ENTRIES:
+                    evicted, _ = _cache.popitem(last=False)
+                    _load_locks.pop(evicted, None)
+
+    if not parquet and not sqlite:
+        data = _select(data, columns, start_date, end_date, equipment)
+    elif trim:
+        data = _select(data, columns, start_date, end_date, None)
+    return data.copy(deep=False)
+
+
+def cached_for_version(file_path, name, compute, key=()):
+    """Return compute() for a data file, calling it again only once the file has changed.
+
+    `name` identifies the analysis and `key` anything else the result
+    depends on (limits, window, sort column), so one file keeps a result
+    per combination. The result is shared by every caller.
+    """
+    entry_key = (os.path.abspath(file_path), name, key)
+    version = file_version(file_path)
+    with _derived_lock:
+        cached = _derived.get(entry_key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+    result = compute()
+    with _derived_lock:
+        _derived[entry_key] = (version, result)
+    return result
+
+
+def count_rows(file_path):
+    """Number of readings in a data file or store; a COUNT(*) on SQLite."""
+    if not has_data(file_path):
+        return 0
+    if is_sqlite_store(file_path):
+        connection = sqlite3.connect(file_path)
+        try:
+            return connection.execute(f"SELECT COUNT(*) FROM {SQLITE_TABLE}").fetchone()[0]
+        except sqlite3.OperationalError:
+            return 0
+        finally:
+            connection.close()
+    return len(load_condition_data(file_path, columns=["Date"]))
+
+
+def _read_sqlite_page(db_path, columns, sort_by, descending, offset, limit):
+    """Let SQLite sort and slice the page: ORDER BY ... LIMIT ... OFFSET."""
+    connection = sqlite3.connect(db_path)
+    try:
+        stored = [row[1] for row in connection.execute(f"PRAGMA table_info({SQLITE_TABLE})")]
+        if not stored:
+            return pd.DataFrame()
+        selected = stored if columns is None else [column for column in stored if column in columns]
+        query = f"SELECT {', '.join(_quote(column) for column in selected)} FROM {SQLITE_TABLE}"
+        if sort_by in stored:
+            # Missing values last, as pandas sorts them; rowid keeps ties in file order
+            direction = "DESC" if descending else "ASC"
+            query += f" ORDER BY {_quote(sort_by)} IS NULL, {_quote(sort_by)} {direction}, rowid"
+        query += " LIMIT ? OFFSET ?"
+        data = pd.read_sql_query(query, connection, params=[int(limit), int(offset)])
+    finally:
+        connection.close()
+    return data
+
+
+def _sort_order(data, sort_by, descending):
+    """Row positions of `data` sorted by one column."""
+    values = data[sort_by].reset_index(drop=True)
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        values = values.astype("string")
+    return values.sort_values(ascending=not descending, kind="stable", na_position="last").index.to_numpy()
+
+
+def load_page(file_path, offset, limit, columns=None, sort_by=None, descending=False):
+    """Load one page of readings: `limit` rows from `offset`, in `sort_by` order.
+
+    On SQLite the projection, sort and slice run in the query. For the CSV
+    file and the Parquet store only the listed columns are read (a column
+    projection on Parquet) and the page is sliced from the cached frame,
+    whose sort order is computed once per data version.
+    """
+    if not has_data(file_path):
+        return pd.DataFrame()
+    if is_sqlite_store(file_path):
+        return apply_schema(_read_sqlite_page(file_path, columns, sort_by, descending, offset, limit))
+
+    needed = None
+    if columns is not None:
+        needed = list(columns) + ([sort_by] if sort_by is not None and sort_by not in columns else [])
+    data = load_condition_data(file_path, columns=needed)
+    if sort_by in data.columns:
+        # The sort order is computed once per data version
+        order = cached_for_version(file_path, "sort_order", lambda: _sort_order(data, sort_by, descending),
+                                   key=(sort_by, descending))
+        positions = order[offset:offset + limit]
+    else:
+        positions = slice(offset, offset + limit)
+    page = data.iloc[positions]
+    if columns is not None:
+        page = page[[column for column in columns if column in page.columns]]
+    return page.reset_index(drop=True)
+
+
+def compact_partition(partition_dir):
+    """Rewrite the files of one month partition as a single file, in write order.
+
+    The merged file is written under a hidden name and renamed into place
+    before the old files are removed, so a reader never sees the month
+    without its readings. Call it under the store's file lock.
+    """
+    files = sorted(os.path.join(partition_dir, name) for name in os.listdir(partition_dir)
+                   if name.endswith(".parquet"))
+    if len(files) < 2:
+        return 0
+    data = pd.concat([pd.read_parquet(name) for name in files], ignore_index=True)
+    stamp = time.time_ns()
+    scratch = os.path.join(partition_dir, f".part-{stamp}.parquet.tmp")
+    data.to_parquet(scratch, index=False)
+    os.replace(scratch, os.path.join(partition_dir, f"part-{stamp}.parquet"))
+    for name in files:
+        os.remove(name)
+    return len(files)
+
+
+def compact_store(store_dir, min_files=2):
+    """Compact every month partition of a store holding at least `min_files` files."""
+    compacted = 0
+    for name in sorted(os.listdir(store_dir)):
+        partition_dir = os.path.join(store_dir, name)
+        if not os.path.isdir(partition_dir):
+            continue
+        count = sum(1 for entry in os.listdir(partition_dir) if entry.endswith(".parquet"))
+        if count >= min_files:
+            compacted += compact_partition(partition_dir)
+    return compacted
+
+
+def write_parquet_partitions(data, store_dir, compact_files=COMPACT_FILES):
+    """Write readings into the month partitions of a Parquet store.
+
+    Each call adds one new file per touched month; a month that then holds
+    more than `compact_files` files is compacted into one.
+    """
+    data = _apply_types(data)
+    if data.empty:
+        return 0
+    months = data["Date"].dt.strftime("%Y-%m")
+    stamp = time.time_ns()
+    for month, part in data.groupby(months, sort=True):
+        partition_dir = os.path.join(store_dir, f"{PARTITION_COLUMN}={month}")
+        os.makedirs(partition_dir, exist_ok=True)
+        part.to_parquet(os.path.join(partition_dir, f"part-{stamp}.parquet"), index=False)
+        if sum(1 for name in os.listdir(partition_dir) if name.endswith(".parquet")) > compact_files:
+            compact_partition(partition_dir)
+    return len(data)
+
+
+def append_readings(file_path, data):
+    """Append new readings to the condition CSV file, Parquet store or SQLite database."""
+    if is_parquet_store(file_path):
+        write_parquet_partitions(data, file_path)
+    elif is_sqlite_store(file_path):
+        write_sqlite_readings(data, file_path)
+    elif os.path.exists(file_path):
+        data.to_csv(file_path, mode="a", header=False, index=False)
+    else:
+        data.to_csv(file_path, index=False)
+
+
+def migrate_csv_to_parquet(csv_path, store_dir):
+    """One-shot migration of the condition CSV into a month-partitioned Parquet store."""
+    if os.path.isdir(store_dir) and _store_files(store_dir):
+        raise FileExistsError(f"Parquet store {store_dir} already contains data.")
+    data = pd.read_csv(csv_path)
+    os.makedirs(store_dir, exist_ok=True)
+    return write_parquet_partitions(data, store_dir)
+
+
+def migrate_csv_to_sqlite(csv_path, db_path):
+    """One-shot migration of the condition CSV into an indexed SQLite database."""
+    if os.path.exists(db_path):
+        raise FileExistsError(f"SQLite database {db_path} already exists.")
+    data = pd.read_csv(csv_path).reindex(columns=CONDITION_COLUMNS)
+    return write_sqlite_readings(data, db_path)
+
+
+def clear_cache():
+    """Drop every cached data file and every result derived from one."""
+    with _cache_lock:
+        _cache.clear()
+        _load_locks.clear()
+    with _listings_lock:
+        _listings.clear()
+    with _derived_lock:
+        _derived.clear()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Condition data storage tools.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    migrate = subparsers.add_parser("migrate-parquet", help="Convert the condition CSV into a Parquet store.")
+    migrate.add_argument("csv_path")
+    migrate.add_argument("store_dir")
+    migrate_sqlite = subparsers.add_parser("migrate-sqlite", help="Convert the condition CSV into a SQLite database.")
+    migrate_sqlite.add_argument("csv_path")
+    migrate_sqlite.add_argument("db_path")
+    compact = subparsers.add_parser("compact-parquet", help="Merge the files of each month of a Parquet store.")
+    compact.add_argument("store_dir")
+    args = parser.parse_args()
+
+    if args.command == "migrate-parquet":
+        rows = migrate_csv_to_parquet(args.csv_path, args.store_dir)
+        print(f"Migrated {rows} readings into {args.store_dir}")
+    elif args.command == "migrate-sqlite":
+        rows = migrate_csv_to_sqlite(args.csv_path, args.db_path)
+        print(f"Migrated {rows} readings into {args.db_path}")
+    elif args.command == "compact-parquet":
+        from condition_writer import file_lock
+        with file_lock(args.store_dir):
+            files = compact_store(args.store_dir)
+        print(f"Compacted {files} files in {args.store_dir}")
@@ -0,0 +1,311 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from condition_writer import ensure_under_lock, file_lock, get_writer, rewrite_readings
+from data_store import (CONDITION_COLUMNS, append_readings, cached_for_version, file_version, load_condition_data,
+                        running_mask, sidecar_path)
+
+# Readings checked against the per-equipment limits in equipment_thresholds
+LIMIT_COLUMNS = ["Driving End Temp", "Driven End Temp", "RMS Velocity (mm/s)"]
+
+# Layout of the deviation ledger: the breaching reading plus the limits it broke
+LEDGER_COLUMNS = CONDITION_COLUMNS + ["Breached Limit"]
+
+# Layout of the deviation streaks: consecutive breaching readings of one equipment
+STREAK_COLUMNS = ["Equipment", "Start", "End", "Readings", "Days", "Peak Ratio", "Peak Limit", "Ongoing"]
+
+# Streaks at least this many readings long are reported as persistent
+PERSISTENT_STREAK_READINGS = 3
+
+# Days, back from the latest reading, shown in the fleet health heatmap
+FLEET_HEALTH_DAYS = 30
+
+# Columns read for the fleet health heatmap
+FLEET_HEALTH_COLUMNS = ["Date", "Equipment", "Is Running", *LIMIT_COLUMNS]
+
+
+def build_threshold_table(equipment_thresholds):
+    """Turn the equipment_thresholds mapping into a table indexed by Equipment."""
+    table = pd.DataFrame.from_dict(equipment_thresholds, orient="index")
+    table = table.reindex(columns=LIMIT_COLUMNS).astype("float64")
+    table.index.name = "Equipment"
+    # Hashed once here, so results cached against the limits need not hash the table on every use
+    table.attrs["limits_key"] = int(pd.util.hash_pandas_object(table).sum())
+    return table
+
+
+def limits_key(threshold_table):
+    """Identity of a threshold table's limits, for keying cached results."""
+    if "limits_key" in threshold_table.attrs:
+        return threshold_table.attrs["limits_key"]
+    return int(pd.util.hash_pandas_object(threshold_table).sum())
+
+
+def lookup_positions(values, index):
+    """Position of every value in `index`, or -1 where it is absent."""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        # Resolve each category once, then spread the positions through the codes
+        category_positions = np.append(index.get_indexer(values.cat.categories), -1)
+        return category_positions[values.cat.codes.to_numpy()]
+    return index.get_indexer(values)
+
+
+def limit_arrays(data, threshold_table):
+    """The readings and the equipment limits they are held to, as two (rows, len(LIMIT_COLUMNS)) arrays.
+
+    Limits are NaN for equipment without thresholds.
+    """
+    positions = lookup_positions(data["Equipment"], threshold_table.index)
+    limits = threshold_table.to_numpy(dtype="float32")[positions]
+    limits[positions < 0] = np.nan
+
+    # Compare in float32, the precision readings are held in
+    readings = np.column_stack([
+        pd.to_numeric(data[column], errors="coerce").to_numpy(dtype="float32", na_value=np.nan)
+        if column in data.columns else np.full(len(data), np.nan, dtype="float32")
+        for column in LIMIT_COLUMNS
+    ])
+    return readings, limits
+
+
+def breach_matrix(data, threshold_table):
+    """Compare every reading with its equipment limits in one pass.
+
+    Returns a boolean array of shape (rows, len(LIMIT_COLUMNS)). Equipment
+    without thresholds and missing readings never count as a breach.
+    """
+    readings, limits = limit_arrays(data, threshold_table)
+    with np.errstate(invalid="ignore"):
+        return readings > limits
+
+
+def check_deviations(data, threshold_table):
+    """
+    Identify readings exceeding their equipment thresholds.
+
+    The flagged rows are returned with a "Breached Limit" column naming every
+    limit the reading went over.
+    """
+    if data.empty or "Equipment" not in data.columns:
+        return pd.DataFrame()
+
+    breaches = breach_matrix(data, threshold_table)
+    flagged = breaches.any(axis=1)
+    if not flagged.any():
+        return pd.DataFrame()
+
+    # Encode each row's breaches as a bitmask and look its label up once per combination
+    codes = breaches[flagged] @ (1 << np.arange(len(LIMIT_COLUMNS)))
+    labels = np.array([
+        ", ".join(column for i, column in enumerate(LIMIT_COLUMNS) if code >> i & 1)
+        for code in range(1 << len(LIMIT_COLUMNS))
+    ], dtype=object)
+
+    deviations = data[flagged].copy()
+    deviations["Breached Limit"] = labels[codes]
+    return deviations
+
+
+
+def ledger_path_for(data_path):
+    """Location of the deviation ledger kept next to the condition data.
+
+    The ledger is a SQLite database when the condition data is one, and a CSV file otherwise.
+    """
+    return sidecar_path(data_path, "deviation_ledger")
+
+
+def _stamp_path(ledger_path):
+    return ledger_path + ".stamp.json"
+
+
+def _ledger_stamp(data_path, threshold_table):
+    """What the ledger is up to date with: the limits and the condition data version."""
+    version = file_version(data_path)
+    return {"limits": limits_key(threshold_table), "data_version": list(version) if version else None}
+
+
+def _read_stamp(ledger_path):
+    try:
+        with open(_stamp_path(ledger_path), encoding="utf-8") as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return None
+
+
+def _save_stamp(ledger_path, stamp):
+    # Replaced in one step, so readers never see half a stamp
+    temporary = _stamp_path(ledger_path) + ".tmp"
+    with open(temporary, "w", encoding="utf-8") as handle:
+        json.dump(stamp, handle)
+    os.replace(temporary, _stamp_path(ledger_path))
+
+
+def record_deviations(ledger_path, readings, threshold_table, version_before, version_after):
+    """Append the breaches of a batch the writer just appended to the condition data.
+
+    Called by the data file's writer while it holds the file lock. The batch
+    is only added when the ledger was up to date with the data before it and
+    with the current limits; otherwise the ledger is left stale and rebuilt
+    by the next ensure_ledger.
+    """
+    stamp = _read_stamp(ledger_path)
+    expected = {"limits": limits_key(threshold_table),
+                "data_version": list(version_before) if version_before else None}
+    if stamp != expected or not os.path.exists(ledger_path):
+        return pd.DataFrame()
+    deviations = check_deviations(readings, threshold_table)
+    with file_lock(ledger_path):
+        if not deviations.empty:
+            append_readings(ledger_path, deviations.reindex(columns=LEDGER_COLUMNS))
+        _save_stamp(ledger_path, {"limits": expected["limits"], "data_version": list(version_after)})
+    return deviations
+
+
+def _write_ledger(data_path, ledger_path, threshold_table):
+    deviations = check_deviations(load_condition_data(data_path), threshold_table)
+    rewrite_readings(ledger_path, deviations.reindex(columns=LEDGER_COLUMNS))
+    _save_stamp(ledger_path, _ledger_stamp(data_path, threshold_table))
+    return deviations
+
+
+def ensure_ledger(data_path, ledger_path, threshold_table):
+    """Bring the deviation ledger up to date with the condition data and the limits.
+
+    The ledger is rebuilt from the full history when it is missing, when
+    the limits changed since it was built, or when the data was written
+    outside the app's writer (another tool, an edit of the file). From then
+    on the writer hands every batch it appends to record_deviations.
+    """
+    get_writer(data_path).add_listener(
+        "ledger", lambda batch, before, after: record_deviations(ledger_path, batch, threshold_table, before, after))
+    ensure_under_lock(
+        data_path,
+        lambda: os.path.exists(ledger_path) and _read_stamp(ledger_path) == _ledger_stamp(data_path, threshold_table),
+        lambda: _write_ledger(data_path, ledger_path, threshold_table),
+    )
+
+
+def read_ledger(ledger_path, start_date=None, end_date=None):
+    """Load the recorded deviations, optionally limited to an inclusive date range."""
+    return load_condition_data(ledger_path, start_date=start_date, end_date=end_date)
+
+
+def deviation_streaks(data, threshold_table):
+    """Group each equipment's consecutive breaching readings into streaks.
+
+    Readings are put in date order per equipment; a streak starts at a
+    breach whose previous reading of the same equipment did not breach.
+    Returns one row per streak (start, end, number of readings, peak
+    reading/limit ratio and the limit it was on, whether it is still going)
+    and, for every breaching reading, the start and length of its streak.
+    """
+    if data.empty or "Equipment" not in data.columns:
+        return pd.DataFrame(columns=STREAK_COLUMNS), pd.DataFrame(columns=["Equipment", "Date", "Streak Start",
+                                                                          "Streak Readings"])
+    data = data.dropna(subset=["Equipment"]).sort_values(["Equipment", "Date"], kind="stable", ignore_index=True)
+    readings, limits = limit_arrays(data, threshold_table)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ratios = np.where(readings > limits, readings / limits, -np.inf)
+    flagged = np.isfinite(ratios).any(axis=1)
+
+    equipment = pd.factorize(data["Equipment"])[0]
+    first_of_equipment = np.diff(equipment, prepend=-1) != 0
+    last_of_equipment = np.append(first_of_equipment[1:], True)
+    previous_flagged = np.append(False, flagged[:-1])
+    starts = flagged & (first_of_equipment | ~previous_flagged)
+    streak_ids = np.cumsum(starts)[flagged]
+
+    rows = np.flatnonzero(flagged)
+    peak_columns = ratios[rows].argmax(axis=1)
+    breaches = pd.DataFrame({
+        "Streak": streak_ids,
+        "Equipment": data["Equipment"].to_numpy()[rows],
+        "Date": data["Date"].to_numpy()[rows],
+        "Ratio": ratios[rows, peak_columns],
+        "Limit": np.array(LIMIT_COLUMNS, dtype=object)[peak_columns],
+        "Last": last_of_equipment[rows],
+    })
+    grouped = breaches.groupby("Streak", sort=False)
+    streaks = grouped.agg(
+        **{
+            "Equipment": ("Equipment", "first"),
+            "Start": ("Date", "min"),
+            "End": ("Date", "max"),
+            "Readings": ("Date", "size"),
+            "Peak Ratio": ("Ratio", "max"),
+            "Ongoing": ("Last", "any"),
+        }
+    )
+    streaks["Peak Limit"] = breaches["Limit"].to_numpy()[grouped["Ratio"].idxmax().to_numpy()]
+    streaks["Days"] = (streaks["End"] - streaks["Start"]).dt.days + 1
+    streaks = streaks.reset_index(drop=True).reindex(columns=STREAK_COLUMNS)
+
+    reading_streaks = breaches[["Equipment", "Date"]].copy()
+    reading_streaks["Streak Start"] = grouped["Date"].transform("min")
+    reading_streaks["Streak Readings"] = grouped["Date"].transform("size")
+    return streaks, reading_streaks
+
+
+def streaks_for(file_path, threshold_table):
+    """deviation_streaks over a data file's full history, cached per data version and limits."""
+    columns = ["Date", "Equipment", *LIMIT_COLUMNS]
+    return cached_for_version(
+        file_path, "streaks",
+        lambda: deviation_streaks(load_condition_data(file_path, columns=columns), threshold_table),
+        key=limits_key(threshold_table),
+    )
+
+
+def annotate_streaks(deviations, reading_streaks):
+    """Add the start and length of its streak to every deviation, for the downloadable reports."""
+    if deviations.empty:
+        return deviations
+    lookup = reading_streaks.astype({"Equipment": "str"}).drop_duplicates(["Equipment", "Date"], keep="last")
+    annotated = deviations.astype({"Equipment": "str"}).merge(lookup, on=["Equipment", "Date"], how="left")
+    annotated.index = deviations.index
+    return annotated
+
+
+def fleet_health(data, threshold_table, days=FLEET_HEALTH_DAYS):
+    """Worst reading/limit ratio of every equipment on each of the last `days` days.
+
+    Returns an Equipment × Date table: one row per equipment with limits,
+    one column per day back from the latest reading. Each cell is the
+    highest ratio of any limited reading that day, so 1 is on the limit;
+    days without a running reading are NaN. The worst equipment comes first.
+    """
+    equipment = pd.Index(threshold_table.index.astype("str"), name="Equipment")
+    if data.empty:
+        return pd.DataFrame(index=equipment)
+    last_day = data["Date"].max().normalize()
+    dates = pd.date_range(end=last_day, periods=days, freq="D", name="Date")
+    data = data[(data["Date"] >= dates[0]) & data["Equipment"].notna()]
+    data = data[running_mask(data)]
+
+    readings, limits = limit_arrays(data, threshold_table)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        worst = np.fmax.reduce(readings / limits, axis=1)
+
+    # One pivot: every ratio lands in its (equipment, day) cell, keeping the largest
+    rows = equipment.get_indexer(data["Equipment"].astype("str"))
+    columns = ((data["Date"].dt.normalize() - dates[0]) // pd.Timedelta(days=1)).to_numpy()
+    kept = (rows >= 0) & ~np.isnan(worst)
+    heatmap = np.full((len(equipment), len(dates)), np.nan)
+    np.fmax.at(heatmap, (rows[kept], columns[kept]), worst[kept])
+
+    heatmap = pd.DataFrame(heatmap, index=equipment, columns=dates)
+    order = heatmap.max(axis=1).sort_values(ascending=False, na_position="last", kind="stable").index
+    return heatmap.loc[order]
+
+
+def fleet_health_for(file_path, threshold_table, days=FLEET_HEALTH_DAYS):
+    """fleet_health of a data file, cached per data version, limits and window."""
+    return cached_for_version(
+        file_path, "fleet_health",
+        lambda: fleet_health(load_condition_data(file_path, columns=FLEET_HEALTH_COLUMNS), threshold_table, days),
+        key=(limits_key(threshold_table), days),
+    )
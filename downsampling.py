@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+
+# Points kept per trace of a trend chart unless the view asks for another budget
+DEFAULT_POINT_BUDGET = 1000
+
+# lttb: Largest-Triangle-Three-Buckets, the shape of the line
+# minmax: lowest and highest reading of every bucket, every peak kept
+DOWNSAMPLING_METHODS = ("lttb", "minmax")
+
+
+def lttb_indices(x, y, budget):
+    """Positions of the points Largest-Triangle-Three-Buckets keeps of a sorted series.
+
+    The first and last points are always kept; every bucket in between
+    contributes the point forming the largest triangle with the point kept
+    before it and the average of the next bucket.
+    """
+    count = len(x)
+    if budget >= count or budget < 3:
+        return np.arange(count)
+    x = np.asarray(x, dtype="float64")
+    y = np.asarray(y, dtype="float64")
+    edges = np.linspace(1, count - 1, budget - 1).astype(int)
+    selected = np.empty(budget, dtype=int)
+    selected[0], selected[-1] = 0, count - 1
+    kept = 0
+    for bucket in range(budget - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_end = edges[bucket + 2] if bucket + 2 < len(edges) else count
+        next_x, next_y = x[end:next_end].mean(), y[end:next_end].mean()
+        areas = np.abs((x[kept] - next_x) * (y[start:end] - y[kept])
+                       - (x[kept] - x[start:end]) * (next_y - y[kept]))
+        kept = start + int(np.argmax(areas))
+        selected[bucket + 1] = kept
+    return selected
+
+
+def minmax_indices(x, y, budget):
+    """Positions of the lowest and highest point of each bucket of a sorted series.
+
+    Buckets hold an equal number of points; the first and last points are always kept.
+    """
+    count = len(x)
+    if budget >= count or budget < 4:
+        return np.arange(count)
+    y = np.asarray(y, dtype="float64")
+    buckets = np.arange(count) * ((budget - 2) // 2) // count
+    starts = np.flatnonzero(np.diff(buckets, prepend=-1))
+    sizes = np.diff(np.append(starts, count))
+    kept = [[0, count - 1]]
+    for extreme in (np.fmin, np.fmax):
+        # First point of each bucket that equals the bucket's extreme
+        hits = np.flatnonzero(y == np.repeat(extreme.reduceat(y, starts), sizes))
+        kept.append(hits[np.unique(buckets[hits], return_index=True)[1]])
+    return np.unique(np.concatenate(kept))
+
+
+def downsample(data, x, y, by=None, budget=DEFAULT_POINT_BUDGET, method="lttb"):
+    """Thin the rows of a chart to at most about `budget` points per trace.
+
+    Each trace (one per value of `by`) is sorted by `x`, missing `y` values
+    are dropped, and the points to keep are picked with LTTB or the min/max
+    envelope. Returns the kept rows in trace and `x` order.
+    """
+    if method not in DOWNSAMPLING_METHODS:
+        raise ValueError(f"Unknown downsampling method: {method}")
+    pick = lttb_indices if method == "lttb" else minmax_indices
+    data = data.dropna(subset=[y])
+    data = data.sort_values([by, x] if by is not None else [x], kind="stable")
+    x_values = data[x].to_numpy()
+    if pd.api.types.is_datetime64_any_dtype(data[x]):
+        x_values = x_values.astype("datetime64[ns]").astype("int64")
+    y_values = data[y].to_numpy(dtype="float64")
+
+    if by is None:
+        return data.iloc[pick(x_values, y_values, budget)]
+    traces = data[by].to_numpy()
+    boundaries = np.flatnonzero(traces[1:] != traces[:-1]) + 1
+    starts = np.concatenate([[0], boundaries])
+    ends = np.concatenate([boundaries, [len(data)]])
+    positions = [start + pick(x_values[start:end], y_values[start:end], budget)
+                 for start, end in zip(starts, ends) if end > start]
+    return data.iloc[np.concatenate(positions)] if positions else data
@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+
+from data_store import cached_for_version, load_condition_data
+from deviations import LIMIT_COLUMNS, limits_key
+
+# Days of history, back from each equipment's latest reading, that its trend is fitted on
+FORECAST_WINDOW_DAYS = 90
+
+# Projections further ahead than this are not reported
+FORECAST_HORIZON_DAYS = 365
+
+# Fewest readings a trend is fitted on
+MIN_TREND_READINGS = 5
+
+# Columns read to fit the trends
+FORECAST_COLUMNS = ["Date", "Equipment", "Is Running", *LIMIT_COLUMNS]
+
+# Layout of the forecast
+FORECAST_OUTPUT_COLUMNS = [
+    "Equipment", "Reading", "Trend Value", "Limit", "Slope (per day)", "Days to Limit", "Projected Date"
+]
+
+
+def fit_trends(data, columns=LIMIT_COLUMNS, window_days=FORECAST_WINDOW_DAYS):
+    """Fit a straight line to every equipment's recent readings of each column.
+
+    All fits come from one grouped sum of n, x, y, x² and xy per equipment and
+    column, solved with the closed-form least-squares formulas. Readings of
+    stopped equipment are left out. Returns slope per day, intercept and the
+    number of readings, indexed by Equipment, plus the latest date of each.
+    """
+    data = data.dropna(subset=["Date", "Equipment"])
+    running = data["Is Running"].to_numpy(dtype=bool) if "Is Running" in data.columns else True
+    origin = data["Date"].min()
+    x = ((data["Date"] - origin) / pd.Timedelta(days=1)).to_numpy(dtype="float64")
+    latest = data.groupby("Equipment", observed=True)["Date"].transform("max")
+    recent = (data["Date"] >= latest - pd.Timedelta(days=window_days)).to_numpy() & running
+
+    sums = {}
+    for column in columns:
+        y = pd.to_numeric(data[column], errors="coerce").to_numpy(dtype="float64")
+        valid = recent & ~np.isnan(y)
+        xv = np.where(valid, x, 0.0)
+        yv = np.where(valid, y, 0.0)
+        sums.update({
+            (column, "n"): valid.astype("float64"),
+            (column, "x"): xv,
+            (column, "y"): yv,
+            (column, "xx"): xv * xv,
+            (column, "xy"): xv * yv,
+        })
+    totals = pd.DataFrame(sums, index=data.index).groupby(data["Equipment"], observed=True).sum()
+
+    fits = {}
+    for column in columns:
+        n, sx, sy = totals[(column, "n")], totals[(column, "x")], totals[(column, "y")]
+        denominator = n * totals[(column, "xx")] - sx * sx
+        with np.errstate(divide="ignore", invalid="ignore"):
+            slope = (n * totals[(column, "xy")] - sx * sy) / denominator
+            intercept = (sy - slope * sx) / n
+        usable = (n >= MIN_TREND_READINGS) & (denominator > 0)
+        fits[(column, "slope")] = slope.where(usable)
+        fits[(column, "intercept")] = intercept.where(usable)
+        fits[(column, "n")] = n
+    fits = pd.DataFrame(fits)
+    last_date = data.groupby("Equipment", observed=True)["Date"].max()
+    fits[("Date", "x")] = (last_date - origin) / pd.Timedelta(days=1)
+    fits[("Date", "last")] = last_date
+    return fits
+
+
+def time_to_limit(data, threshold_table, window_days=FORECAST_WINDOW_DAYS):
+    """Project when each equipment's trend reaches its limit.
+
+    Returns one row per equipment and limited reading, sorted by days to the
+    limit. Trends that are flat, falling or reach the limit beyond
+    FORECAST_HORIZON_DAYS have no projection; a trend already over its limit
+    counts as zero days.
+    """
+    fits = fit_trends(data, LIMIT_COLUMNS, window_days)
+    limits = threshold_table.reindex(fits.index.astype("str"))
+    parts = []
+    for column in LIMIT_COLUMNS:
+        slope = fits[(column, "slope")].to_numpy()
+        trend = fits[(column, "intercept")].to_numpy() + slope * fits[("Date", "x")].to_numpy()
+        limit = limits[column].to_numpy()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            days = np.where(trend >= limit, 0.0, np.where(slope > 0, (limit - trend) / slope, np.nan))
+        days[days > FORECAST_HORIZON_DAYS] = np.nan
+        parts.append(pd.DataFrame({
+            "Equipment": fits.index.astype("str"),
+            "Reading": column,
+            "Trend Value": trend,
+            "Limit": limit,
+            "Slope (per day)": slope,
+            "Days to Limit": days,
+            "Projected Date": fits[("Date", "last")].to_numpy() + pd.to_timedelta(days, unit="D"),
+        }))
+    forecast = pd.concat(parts, ignore_index=True).dropna(subset=["Limit", "Trend Value"])
+    # Among readings already over their limit, the furthest over comes first
+    forecast["Excess"] = forecast["Trend Value"] - forecast["Limit"]
+    forecast = forecast.sort_values(["Days to Limit", "Excess"], ascending=[True, False], ignore_index=True)
+    return forecast.reindex(columns=FORECAST_OUTPUT_COLUMNS)
+
+
+def forecast_time_to_limit(file_path, threshold_table):
+    """time_to_limit for a data file, cached per data version and limits."""
+    return cached_for_version(
+        file_path, "forecast",
+        lambda: time_to_limit(load_condition_data(file_path, columns=FORECAST_COLUMNS), threshold_table),
+        key=limits_key(threshold_table),
+    )
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+
+from rules import evaluate_rules, rule_values
+
+# Layout of the recommendation summary
+RECOMMENDATION_COLUMNS = ["Equipment", "Recommendation", "Count", "First Seen", "Last Seen", "Worst Value"]
+
+
+def summarize_recommendations(data, rules):
+    """Aggregate rule hits per equipment and rule.
+
+    Each row gives how often the rule fired, when it was first and last seen,
+    and the worst reading behind it (highest for upper limits, lowest for
+    lower limits); rules on text readings have no value. Also returns the
+    per-rule evaluation times in milliseconds.
+    """
+    if data.empty or "Equipment" not in data.columns:
+        return pd.DataFrame(columns=RECOMMENDATION_COLUMNS), {}
+
+    hits, timings = evaluate_rules(data, rules)
+    rows, fired = np.nonzero(hits.to_numpy())
+    if len(rows) == 0:
+        return pd.DataFrame(columns=RECOMMENDATION_COLUMNS), timings
+
+    # Flip lower-limit readings so the worst value is always the largest
+    signs = np.array([-1.0 if rule["op"] in ("<", "<=") else 1.0 for rule in rules])
+    values = np.column_stack([
+        rule_values(data, rule).astype("float64") if rule["numeric"] else np.full(len(data), np.nan)
+        for rule in rules
+    ])
+    recommendations = pd.DataFrame({
+        "Equipment": data["Equipment"].to_numpy()[rows],
+        "Recommendation": np.array([rule["message"] for rule in rules], dtype=object)[fired],
+        "Date": data["Date"].to_numpy()[rows],
+        "Value": values[rows, fired] * signs[fired],
+        "Sign": signs[fired],
+    })
+    summary = recommendations.groupby(["Equipment", "Recommendation"], sort=False).agg(
+        **{
+            "Count": ("Date", "size"),
+            "First Seen": ("Date", "min"),
+            "Last Seen": ("Date", "max"),
+            "Worst Value": ("Value", "max"),
+            "Sign": ("Sign", "first"),
+        }
+    ).reset_index()
+    summary["Worst Value"] *= summary.pop("Sign")
+    summary = summary.sort_values(["Count", "Equipment"], ascending=[False, True], ignore_index=True)
+    return summary, timings
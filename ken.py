@@ -3,6 +3,7 @@ import pandas as pd
 import os
 from datetime import datetime, timedelta
 import plotly.express as px
+from data_store import load_condition_data
 
 # Define deviation thresholds for specific equipment
 equipment_thresholds = ({
@@ -221,8 +222,7 @@ if "page" not in st.session_state:
 file_path = "C:/Users/USER/Desktop/condition_data.csv"
 
 if os.path.exists(file_path) and os.path.getsize(file_path) > 0:
-    data = pd.read_csv(file_path)
-    data["Date"] = pd.to_datetime(data["Date"])  # Ensure the Date column is in datetime format
+    data = load_condition_data(file_path)
 else:
     st.warning("No data file found or the file is empty.")
     data = pd.DataFrame()  # Set an empty DataFrame if no data is available
@@ -240,7 +240,7 @@ def calculate_kpis(file_path):
         }
 
     # Load the CSV file
-    data = pd.read_csv(file_path)
+    data = load_condition_data(file_path)
     if data.empty:
         st.warning("The data file is empty. Showing default KPI values.")
         return {
@@ -322,13 +322,11 @@ if st.session_state.page == "main":
         if not os.path.exists(file_path) or os.path.getsize(file_path) == 0:
             return pd.DataFrame(), "No data available for analysis."
 
-        data = pd.read_csv(file_path)
+        data = load_condition_data(file_path)
         if data.empty:
             return pd.DataFrame(), "No data available for analysis."
 
-        # Convert Date column to datetime and filter data
-        data["Date"] = pd.to_datetime(data["Date"], errors="coerce")
-        data = data.dropna(subset=["Date"])  # Drop rows with invalid dates
+        # Filter data (Date is parsed once by the loader)
         filtered_data = data[(data["Date"] >= pd.to_datetime(start_date)) & (data["Date"] <= pd.to_datetime(end_date))]
 
         if filtered_data.empty:
@@ -337,7 +335,7 @@ if st.session_state.page == "main":
         deviations = []
 
         # Check for deviations based on thresholds
-        grouped = filtered_data.groupby("Equipment")
+        grouped = filtered_data.groupby("Equipment", observed=True)
         for equipment, group in grouped:
             if equipment in equipment_thresholds:
                 thresholds = equipment_thresholds[equipment]
@@ -430,7 +428,7 @@ if st.session_state.page == "main":
         # Calculate the percentage of running equipment per area
         if "Area" in data.columns and "Is Running" in data.columns:
             running_percentage_by_area = (
-                    data.groupby("Area")["Is Running"].mean() * 100
+                    data.groupby("Area", observed=True)["Is Running"].mean() * 100
             ).reset_index()
             running_percentage_by_area.rename(
                 columns={"Is Running": "Running Percentage (%)"}, inplace=True
@@ -487,7 +485,7 @@ if st.session_state.page == "main":
 
         # Running Equipment Count
         if "Is Running" in data.columns and "Area" in data.columns:
-            running_equipment_by_area = data.groupby(["Date", "Area"])["Is Running"].sum().reset_index()
+            running_equipment_by_area = data.groupby(["Date", "Area"], observed=True)["Is Running"].sum().reset_index()
             st.write("### Running Equipment Count by Area")
 
             # Create the bar chart with Plotly
@@ -518,12 +516,11 @@ elif st.session_state.page == "monitoring":
         """Load data from a CSV file."""
         if not os.path.exists(file_path):
             return pd.DataFrame()  # Return an empty DataFrame if file doesn't exist
-        return pd.read_csv(file_path)
+        return load_condition_data(file_path)
 
 
     def filter_data(df, equipment, start_date, end_date):
         """Filter data by equipment and date range."""
-        df["Date"] = pd.to_datetime(df["Date"])  # Convert Date column to datetime
         filtered_df = df[
             (df["Equipment"] == equipment) &
             (df["Date"] >= pd.to_datetime(start_date)) &
@@ -0,0 +1,161 @@
+import os
+import threading
+
+import pandas as pd
+
+from condition_writer import file_lock, get_writer
+from data_store import apply_schema, cached_for_version, file_version, load_condition_data
+
+# Readings summarised per day: count, sum, min and max of each
+ROLLUP_METRICS = [
+    "Driving End Temp", "Driven End Temp", "Avg Temp", "RMS Velocity (mm/s)",
+    "Gearbox Temp", "Gearbox RMS Velocity (mm/s)"
+]
+
+# Columns read from the condition data to build the rollups
+ROLLUP_COLUMNS = [
+    "Date", "Area", "Equipment", "Is Running", "Driving End Temp", "Driven End Temp",
+    "RMS Velocity (mm/s)", "Gearbox Temp", "Gearbox RMS Velocity (mm/s)"
+]
+
+# Daily rollups per data file: path -> {"version", "by_area", "by_equipment",
+# "pending": batches written since, "written": data version after them}
+_rollups = {}
+_rollups_lock = threading.Lock()
+
+
+def aggregate_daily(readings, key):
+    """Summarise readings per Date and `key` ("Area" or "Equipment").
+
+    Each row holds the number of readings, how many were running, and the
+    count, sum, min and max of every metric in ROLLUP_METRICS.
+    """
+    readings = apply_schema(readings.reindex(columns=ROLLUP_COLUMNS))
+    readings["Avg Temp"] = readings[["Driving End Temp", "Driven End Temp"]].mean(axis=1)
+    # Plain string keys, so rollups built from different batches line up
+    readings[key] = readings[key].astype("str")
+    grouped = readings.groupby(["Date", key])
+
+    metrics = grouped[ROLLUP_METRICS]
+    return pd.concat([
+        grouped.size().rename("Readings"),
+        grouped["Is Running"].sum().rename("Running"),
+        metrics.count().astype("float64").add_suffix(" Count"),
+        metrics.sum().astype("float64").add_suffix(" Sum"),
+        metrics.min().astype("float64").add_suffix(" Min"),
+        metrics.max().astype("float64").add_suffix(" Max"),
+    ], axis=1)
+
+
+def combine_rollups(rollup, update):
+    """Fold the rollup of newly written readings into an existing rollup."""
+    combined = pd.concat([rollup, update]).groupby(level=[0, 1])
+    minimums = [column for column in rollup.columns if column.endswith(" Min")]
+    maximums = [column for column in rollup.columns if column.endswith(" Max")]
+    totals = [column for column in rollup.columns if column not in minimums + maximums]
+    result = pd.concat([
+        combined[totals].sum(),
+        combined[minimums].min(),
+        combined[maximums].max(),
+    ], axis=1)
+    return result[rollup.columns]
+
+
+def _rollup_listener(key):
+    def on_written(batch, version_before, version_after):
+        with _rollups_lock:
+            entry = _rollups.get(key)
+            if entry is None:
+                return
+            if entry["written"] != version_before:
+                # The file changed outside this writer; rebuild from the data on the next read
+                del _rollups[key]
+                return
+            # Keep the write path short: the batch is folded in by the next read
+            entry["pending"].append(batch)
+            entry["written"] = version_after
+    return on_written
+
+
+def _fold_pending(entry):
+    batch = pd.concat(entry.pop("pending"), ignore_index=True)
+    entry["by_area"] = combine_rollups(entry["by_area"], aggregate_daily(batch, "Area"))
+    entry["by_equipment"] = combine_rollups(entry["by_equipment"], aggregate_daily(batch, "Equipment"))
+    entry["version"] = entry["written"]
+    entry["pending"] = []
+
+
+def get_rollups(file_path):
+    """Return the daily (by area, by equipment) rollups of a condition data file.
+
+    They are built from the data once. After that the file's writer hands
+    over every batch it appends, and only those batches are aggregated and
+    folded into the totals.
+    """
+    key = os.path.abspath(file_path)
+    get_writer(file_path).add_listener("rollups", _rollup_listener(key))
+
+    version = file_version(file_path)
+    with _rollups_lock:
+        entry = _rollups.get(key)
+        if entry is not None and entry["pending"]:
+            _fold_pending(entry)
+        if entry is not None and entry["version"] == version:
+            return entry["by_area"], entry["by_equipment"]
+
+    # Rebuild under the data file's lock: a batch written during the load would
+    # otherwise be in the data and also be handed to the listener. The file lock
+    # is taken before _rollups_lock, in the order the writer's listener takes them.
+    with file_lock(file_path):
+        version = file_version(file_path)
+        data = load_condition_data(file_path, columns=ROLLUP_COLUMNS)
+        entry = {
+            "version": version,
+            "by_area": aggregate_daily(data, "Area"),
+            "by_equipment": aggregate_daily(data, "Equipment"),
+            "pending": [],
+            "written": version,
+        }
+        with _rollups_lock:
+            _rollups[key] = entry
+    return entry["by_area"], entry["by_equipment"]
+
+
+def home_kpis(by_area):
+    """Every home-page KPI and chart series, from the daily per-area rollup.
+
+    The rollup already holds one row per day and area, so the KPIs and the
+    three chart series come from sums over its few rows instead of passes
+    over the readings. Numbers are None when there is nothing to average.
+    """
+    totals = by_area.sum()
+    running_percentage = float(totals["Running"] / totals["Readings"] * 100) if totals["Readings"] else None
+    temperature_counts = totals[["Driving End Temp Count", "Driven End Temp Count"]]
+    avg_temp = None
+    if (temperature_counts > 0).all():
+        avg_temp = float(totals["Driving End Temp Sum"] / totals["Driving End Temp Count"]
+                         + totals["Driven End Temp Sum"] / totals["Driven End Temp Count"]) / 2
+
+    area_totals = by_area.groupby(level="Area")[["Running", "Readings"]].sum()
+    daily_temp = by_area.groupby(level="Date")[["Avg Temp Sum", "Avg Temp Count"]].sum()
+    return {
+        "compliance_rate": running_percentage,
+        "avg_temp": avg_temp,
+        "running_percentage": running_percentage,
+        "running_by_area": (area_totals["Running"] / area_totals["Readings"] * 100)
+        .rename("Running Percentage (%)").reset_index(),
+        "avg_temp_trend": (daily_temp["Avg Temp Sum"] / daily_temp["Avg Temp Count"])
+        .rename("Avg Temp").dropna().reset_index(),
+        "running_by_date": by_area["Running"].rename("Is Running").reset_index(),
+    }
+
+
+def get_home_kpis(file_path):
+    """home_kpis of a condition data file, computed once per data version.
+
+    The cached result is shared; every caller gets its own shallow copies of
+    the frames, so nothing done with them reaches the cache.
+    """
+    kpis = cached_for_version(file_path, "home_kpis", lambda: home_kpis(get_rollups(file_path)[0]))
+    return {name: value.copy(deep=False) if isinstance(value, pd.DataFrame) else value
+            for name, value in kpis.items()}
@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+
+from data_store import CONDITION_COLUMNS, NUMERIC_COLUMNS
+
+# Columns edited in the route grid (Date and Area are chosen once for the round)
+ROUTE_COLUMNS = [column for column in CONDITION_COLUMNS if column not in ("Date", "Area")]
+
+# Same ranges as the number inputs of the single-equipment form
+INPUT_LIMITS = {
+    "Driving End Temp": (0.0, 200.0),
+    "Driven End Temp": (0.0, 200.0),
+    "RMS Velocity (mm/s)": (0.0, 100.0),
+    "Peak Acceleration (g)": (0.0, 10.0),
+    "Displacement (µm)": (0.0, 1000.0),
+    "Gearbox Temp": (0.0, 200.0),
+    "Gearbox RMS Velocity (mm/s)": (0.0, 100.0),
+    "Gearbox Peak Acceleration (g)": (0.0, 10.0),
+    "Gearbox Displacement (µm)": (0.0, 1000.0),
+}
+
+# Values recorded for equipment that is not running, as in the single-equipment form
+NOT_RUNNING_VALUES = {
+    **{column: 0.0 for column in NUMERIC_COLUMNS},
+    "Oil Level": "N/A",
+    "Abnormal Sound": "N/A",
+    "Leakage": "N/A",
+    "Observation": "Not Running",
+    "Gearbox Oil Level": "N/A",
+    "Gearbox Leakage": "N/A",
+    "Gearbox Abnormal Sound": "N/A",
+}
+
+
+def route_template(equipment):
+    """Build the editable grid for an area route: one row per equipment."""
+    template = pd.DataFrame({"Equipment": list(dict.fromkeys(equipment))})
+    template["Is Running"] = True
+    for column in NUMERIC_COLUMNS:
+        template[column] = np.nan
+    template["Oil Level"] = "Normal"
+    template["Abnormal Sound"] = "No"
+    template["Leakage"] = "No"
+    template["Observation"] = ""
+    for column in ("Gearbox Oil Level", "Gearbox Leakage", "Gearbox Abnormal Sound"):
+        template[column] = None
+    return template.reindex(columns=ROUTE_COLUMNS)
+
+
+def _equipment_names(readings, mask):
+    return ", ".join(readings.loc[mask, "Equipment"].astype(str))
+
+
+def prepare_route_readings(edited, date, area):
+    """Validate a completed route grid and turn it into condition readings.
+
+    All rows are checked together; returns the readings in file column order
+    and a list of problems, which is empty when the round can be saved.
+    """
+    readings = edited.reindex(columns=ROUTE_COLUMNS).copy()
+    running = readings["Is Running"].fillna(False).astype(bool)
+    numeric = readings[NUMERIC_COLUMNS].apply(pd.to_numeric, errors="coerce")
+
+    problems = []
+    missing_temps = running & numeric[["Driving End Temp", "Driven End Temp"]].isna().any(axis=1)
+    if missing_temps.any():
+        problems.append(
+            f"Enter both temperatures for running equipment: {_equipment_names(readings, missing_temps)}")
+
+    lows = pd.Series({column: INPUT_LIMITS[column][0] for column in NUMERIC_COLUMNS})
+    highs = pd.Series({column: INPUT_LIMITS[column][1] for column in NUMERIC_COLUMNS})
+    out_of_range = running & ((numeric < lows) | (numeric > highs)).any(axis=1)
+    if out_of_range.any():
+        problems.append(f"Readings outside the allowed range for: {_equipment_names(readings, out_of_range)}")
+
+    readings[NUMERIC_COLUMNS] = numeric
+    readings["Is Running"] = running
+    for column, value in NOT_RUNNING_VALUES.items():
+        readings.loc[~running, column] = value
+
+    readings.insert(0, "Date", date)
+    readings.insert(1, "Area", area)
+    return readings.reindex(columns=CONDITION_COLUMNS), problems
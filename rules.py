@@ -0,0 +1,155 @@
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from data_store import CONDITION_COLUMNS, NUMERIC_COLUMNS
+from deviations import lookup_positions
+
+# Comparisons a rule can use between a reading and its limit
+OPERATORS = {
+    ">": np.greater,
+    ">=": np.greater_equal,
+    "<": np.less,
+    "<=": np.less_equal,
+    "==": np.equal,
+    "!=": np.not_equal,
+}
+
+
+def load_rules(rules_path, equipment_limits=None):
+    """Read a rules file and compile it.
+
+    The file holds a list of global "rules" ({"column", "op", "limit",
+    "message"}), and "areas" and "equipment" mappings of {column: limit}
+    overrides. An equipment override beats an area override, which beats the
+    global limit. `equipment_limits` takes the same shape as the "equipment"
+    mapping (e.g. equipment_thresholds) and is applied under the file's.
+    """
+    with open(rules_path, encoding="utf-8") as handle:
+        spec = json.load(handle)
+    equipment = {}
+    for source in (equipment_limits or {}, spec.get("equipment", {})):
+        for name, limits in source.items():
+            equipment.setdefault(name, {}).update(limits)
+    return compile_rules(spec.get("rules", []), spec.get("areas", {}), equipment)
+
+
+def _overrides(mapping, column, numeric):
+    limits = {key: limits[column] for key, limits in mapping.items() if column in limits}
+    return pd.Series(limits, dtype="float32" if numeric else object)
+
+
+def compile_rules(rules, area_limits=None, equipment_limits=None):
+    """Turn rule definitions into ready-to-evaluate rules.
+
+    Each compiled rule keeps its global limit plus the area and equipment
+    overrides for its column as lookup series, so evaluation is a handful of
+    array operations whatever the number of overrides.
+    """
+    compiled = []
+    for rule in rules:
+        column, op = rule["column"], rule["op"]
+        if column not in CONDITION_COLUMNS:
+            raise ValueError(f"Rule on unknown column '{column}'.")
+        if op not in OPERATORS:
+            raise ValueError(f"Rule on '{column}' has unknown operator '{op}'.")
+        name = rule.get("name", column)
+        if any(existing["name"] == name for existing in compiled):
+            raise ValueError(f"Duplicate rule name '{name}'; name rules that share a column.")
+        numeric = column in NUMERIC_COLUMNS
+        limit = rule.get("limit")
+        compiled.append({
+            "name": name,
+            "column": column,
+            "op": op,
+            "numeric": numeric,
+            "limit": (np.nan if limit is None else float(limit)) if numeric else limit,
+            "message": rule.get("message", f"{column} {op} limit."),
+            "Area": _overrides(area_limits or {}, column, numeric),
+            "Equipment": _overrides(equipment_limits or {}, column, numeric),
+        })
+    return compiled
+
+
+def rule_values(data, rule):
+    """The readings a rule compares: float32 for numeric columns, objects otherwise."""
+    if rule["column"] not in data.columns:
+        return np.full(len(data), np.nan, dtype="float32" if rule["numeric"] else object)
+    if rule["numeric"]:
+        return pd.to_numeric(data[rule["column"]], errors="coerce").to_numpy(dtype="float32", na_value=np.nan)
+    return data[rule["column"]].to_numpy(dtype=object, na_value=None)
+
+
+def _spread_limits(data, rule, positions, default, area_values, equipment_values, dtype):
+    limits = np.full(len(data), default, dtype=dtype)
+    for key, values in (("Area", area_values), ("Equipment", equipment_values)):
+        overrides = rule[key]
+        if overrides.empty or key not in data.columns:
+            continue
+        # Positions are resolved once per key and override set, and shared by the rules
+        cache = positions.setdefault(key, {})
+        lookup = cache.get(tuple(overrides.index))
+        if lookup is None:
+            lookup = cache[tuple(overrides.index)] = lookup_positions(data[key], overrides.index)
+        found = lookup >= 0
+        limits[found] = values[lookup[found]]
+    return limits
+
+
+def rule_limits(data, rule, positions):
+    """The limit that applies to every reading, after area and equipment overrides."""
+    return _spread_limits(
+        data, rule, positions, rule["limit"], rule["Area"].to_numpy(), rule["Equipment"].to_numpy(),
+        "float32" if rule["numeric"] else object)
+
+
+def _category_inputs(data, rule, positions):
+    # Equality on a categorical column compares category codes instead of strings
+    column = data[rule["column"]]
+    categories = column.cat.categories
+
+    def codes_of(limits):
+        # -1 marks a missing limit, -2 a value that is not a category and so never matches
+        limits = np.asarray(limits, dtype=object)
+        missing = pd.isna(limits)
+        codes = np.where(missing, -1, categories.get_indexer(np.where(missing, "", limits)))
+        codes[~missing & (codes == -1)] = -2
+        return codes
+
+    default = codes_of([rule["limit"]])[0]
+    limits = _spread_limits(
+        data, rule, positions, default, codes_of(rule["Area"].to_numpy()), codes_of(rule["Equipment"].to_numpy()),
+        "int32")
+    values = column.cat.codes.to_numpy()
+    return values, limits, (values >= 0) & (limits != -1)
+
+
+def rule_inputs(data, rule, positions):
+    """The readings of a rule, the limits they are compared with and where both are present."""
+    if (not rule["numeric"] and rule["op"] in ("==", "!=") and rule["column"] in data.columns
+            and isinstance(data[rule["column"]].dtype, pd.CategoricalDtype)):
+        return _category_inputs(data, rule, positions)
+    values = rule_values(data, rule)
+    limits = rule_limits(data, rule, positions)
+    return values, limits, ~pd.isna(values) & ~pd.isna(limits)
+
+
+def evaluate_rules(data, rules):
+    """Evaluate every rule over all readings.
+
+    Returns a boolean frame with one column per rule name, and the time each
+    rule took in milliseconds. Missing readings never fire a rule.
+    """
+    hits = {}
+    timings = {}
+    positions = {}
+    for rule in rules:
+        started = time.perf_counter()
+        values, limits, present = rule_inputs(data, rule, positions)
+        with np.errstate(invalid="ignore"):
+            fired = OPERATORS[rule["op"]](values, limits)
+        hits[rule["name"]] = np.asarray(fired, dtype=bool) & present
+        timings[rule["name"]] = (time.perf_counter() - started) * 1000
+    return pd.DataFrame(hits, index=data.index), timings
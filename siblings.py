@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+
+from data_store import running_mask
+
+# Readings compared between the units of a duty/standby set
+SIBLING_METRICS = ["Driving End Temp", "Driven End Temp", "RMS Velocity (mm/s)"]
+
+# A unit drifts when its average is further than this from the average of its siblings
+SIBLING_DRIFT_LIMITS = {
+    "Driving End Temp": 5.0,
+    "Driven End Temp": 5.0,
+    "RMS Velocity (mm/s)": 1.0,
+}
+
+# Days of history, back from the latest reading, that the units are compared over
+SIBLING_WINDOW_DAYS = 90
+
+# Columns read for the comparison
+SIBLING_COLUMNS = ["Date", "Area", "Equipment", "Is Running", *SIBLING_METRICS]
+
+# Tags are <unit>-<type>-<number>, with a -A/-B/... or -1/-2/... suffix for the units of a set
+TAG_PATTERN = r"^(?P<Set>\d+-[A-Z]+-\d+)(?:-(?P<Unit>[A-Z0-9]+))?$"
+
+
+def parse_tags(tags):
+    """Split equipment tags into their set and unit, indexed by tag.
+
+    Tags that do not follow the plant naming form a set of their own.
+    """
+    tags = pd.Index(pd.unique(np.asarray(tags, dtype=object)), name="Equipment").dropna()
+    parts = pd.Series(tags, index=tags).str.extract(TAG_PATTERN)
+    parts["Set"] = parts["Set"].fillna(pd.Series(tags, index=tags))
+    parts["Unit"] = parts["Unit"].fillna("")
+    return parts
+
+
+def sibling_comparison(data, window_days=SIBLING_WINDOW_DAYS):
+    """Compare every unit of a duty/standby set with the other units of its set.
+
+    Each unit gets its running share and running reading count, its average
+    of each metric while running, the difference to the average of its
+    siblings (the other units of the set) and the metrics it drifts on.
+    Sets with a single unit are left out; in a two-unit set both units show
+    the same gap.
+    """
+    if data.empty:
+        return pd.DataFrame()
+    data = data[data["Date"] >= data["Date"].max() - pd.Timedelta(days=window_days)]
+
+    # Parse each distinct tag once, then spread the set through the rows
+    tags = parse_tags(data["Equipment"].dropna().unique())
+    multi_unit = tags.groupby("Set")["Unit"].transform("size") > 1
+    tags = tags[multi_unit]
+    data = data[data["Equipment"].isin(tags.index)]
+    if data.empty:
+        return pd.DataFrame()
+
+    running = running_mask(data)
+    metrics = data[SIBLING_METRICS].astype("float64")
+    metrics[~running] = np.nan
+    metrics["Running Readings"] = running
+    grouped = metrics.groupby(data["Equipment"].astype("str"))
+    units = grouped.mean()
+    units["Readings"] = grouped.size()
+    units["Running Readings"] = grouped["Running Readings"].sum()
+    units["Running %"] = units["Running Readings"] / units["Readings"] * 100
+    units = units.join(tags, how="inner")
+
+    # Average of the siblings: the set total without the unit itself
+    by_set = units.groupby("Set")
+    drifting = pd.Series("", index=units.index)
+    for metric in SIBLING_METRICS:
+        present = units[metric].notna()
+        set_sum = by_set[metric].transform("sum")
+        set_count = by_set[metric].transform("count")
+        others = (set_sum - units[metric].fillna(0)) / (set_count - present)
+        units[f"{metric} vs Siblings"] = units[metric] - others
+        over = units[f"{metric} vs Siblings"].abs() > SIBLING_DRIFT_LIMITS[metric]
+        drifting = drifting.where(~over, drifting + np.where(drifting == "", "", ", ") + metric)
+    units["Drifting"] = drifting
+
+    units = units.reset_index().sort_values(["Set", "Unit"], ignore_index=True)
+    columns = ["Set", "Unit", "Equipment", "Running %", "Running Readings"]
+    for metric in SIBLING_METRICS:
+        columns += [metric, f"{metric} vs Siblings"]
+    return units[columns + ["Drifting"]]
@@ -0,0 +1,126 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from data_store import cached_for_version, load_condition_data, running_mask
+from deviations import lookup_positions
+
+# ISO 10816-1 zone boundaries for RMS velocity (mm/s): A/B, B/C and C/D per machine class
+ISO_10816_BOUNDARIES = {
+    "I": (0.71, 1.8, 4.5),      # Small machines, up to 15 kW
+    "II": (1.12, 2.8, 7.1),     # Medium machines, 15 to 75 kW
+    "III": (1.8, 4.5, 11.2),    # Large machines on rigid foundations
+    "IV": (2.8, 7.1, 18.0),     # Large machines on soft foundations
+}
+
+# Class used for equipment without an entry in the machine classes
+DEFAULT_MACHINE_CLASS = "II"
+
+# A: newly commissioned, B: unrestricted operation, C: restricted operation, D: damage occurs
+ZONE_DTYPE = pd.CategoricalDtype(["A", "B", "C", "D"], ordered=True)
+
+# Readings classified, and the column their zone is stored in
+ZONE_COLUMNS = {
+    "RMS Velocity (mm/s)": "Zone",
+    "Gearbox RMS Velocity (mm/s)": "Gearbox Zone",
+}
+
+# Columns needed to classify and group the readings
+VIBRATION_COLUMNS = ["Date", "Area", "Equipment", "Is Running", *ZONE_COLUMNS]
+
+
+def load_machine_classes(rules_path):
+    """Read the "machine_classes" mapping of {equipment: class} from the rules file."""
+    with open(rules_path, encoding="utf-8") as handle:
+        machine_classes = json.load(handle).get("machine_classes", {})
+    unknown = sorted(set(machine_classes.values()) - set(ISO_10816_BOUNDARIES))
+    if unknown:
+        raise ValueError(f"Unknown machine classes: {', '.join(unknown)}")
+    return machine_classes
+
+
+def classify_zones(data, column, machine_classes=None):
+    """Assign every reading of `column` to its ISO 10816 zone.
+
+    Each row's class boundaries are looked up once through the Equipment
+    codes and the zone is the number of boundaries the reading reaches.
+    Missing readings and readings of stopped equipment get no zone.
+    """
+    classes = list(ISO_10816_BOUNDARIES)
+    boundaries = np.array([ISO_10816_BOUNDARIES[name] for name in classes], dtype="float32")
+
+    class_index = np.full(len(data), classes.index(DEFAULT_MACHINE_CLASS))
+    if machine_classes and "Equipment" in data.columns:
+        mapping = pd.Series({equipment: classes.index(name) for equipment, name in machine_classes.items()})
+        positions = lookup_positions(data["Equipment"], mapping.index)
+        found = positions >= 0
+        class_index[found] = mapping.to_numpy()[positions[found]]
+
+    if column in data.columns:
+        values = pd.to_numeric(data[column], errors="coerce").to_numpy(dtype="float32", na_value=np.nan, copy=True)
+    else:
+        values = np.full(len(data), np.nan, dtype="float32")
+    values[~running_mask(data)] = np.nan
+    codes = (values[:, None] >= boundaries[class_index]).sum(axis=1)
+    codes[np.isnan(values)] = -1
+    zones = pd.Categorical.from_codes(codes, dtype=ZONE_DTYPE)
+    return pd.Series(zones, index=data.index, name=ZONE_COLUMNS.get(column))
+
+
+def add_zones(data, machine_classes=None):
+    """Return the readings with a "Zone" and a "Gearbox Zone" column."""
+    data = data.copy()
+    for column, zone_column in ZONE_COLUMNS.items():
+        data[zone_column] = classify_zones(data, column, machine_classes)
+    return data
+
+
+def zone_distribution(data, zone_column="Zone", by="Area"):
+    """Count readings per zone, one row per value of `by` plus a fleet total."""
+    counts = data.groupby([by, zone_column], observed=True).size().unstack(zone_column, fill_value=0)
+    counts = counts.reindex(columns=ZONE_DTYPE.categories, fill_value=0)
+    counts.index = counts.index.astype("str")
+    counts.loc["Fleet"] = counts.sum()
+    return counts
+
+
+def zone_changes(data, zone_column="Zone"):
+    """Readings whose zone got worse than the equipment's previous reading.
+
+    Returns Equipment, Date, the previous and new zone and the reading.
+    """
+    classified = data.dropna(subset=[zone_column]).sort_values(["Equipment", "Date"], kind="stable")
+    codes = classified[zone_column].cat.codes.to_numpy()
+    equipment = pd.factorize(classified["Equipment"])[0]
+    previous = np.roll(codes, 1)
+    worse = (codes > previous) & (equipment == np.roll(equipment, 1))
+    if len(worse):
+        worse[0] = False
+
+    changes = classified.loc[worse, ["Equipment", "Date"]].copy()
+    changes["From Zone"] = pd.Categorical.from_codes(previous[worse], dtype=ZONE_DTYPE)
+    changes["To Zone"] = classified.loc[worse, zone_column].to_numpy()
+    reading = next(column for column, zone in ZONE_COLUMNS.items() if zone == zone_column)
+    changes[reading] = classified.loc[worse, reading].to_numpy()
+    return changes.reset_index(drop=True)
+
+
+def zones_for(file_path, machine_classes=None):
+    """Zone every reading of a data file, cached per data version and machine classes.
+
+    Returns the zoned readings, the zone changes per zone column and, for
+    each zone column with classified readings, the zone counts per area.
+    """
+    def compute():
+        zoned = add_zones(load_condition_data(file_path, columns=VIBRATION_COLUMNS), machine_classes)
+        changes = {zone_column: zone_changes(zoned, zone_column) for zone_column in ZONE_COLUMNS.values()}
+        distributions = {}
+        for zone_column in ZONE_COLUMNS.values():
+            classified = zoned.dropna(subset=[zone_column])
+            if not classified.empty:
+                distributions[zone_column] = zone_distribution(classified, zone_column)
+        return zoned, changes, distributions
+
+    classes_key = tuple(sorted((machine_classes or {}).items()))
+    return cached_for_version(file_path, "zones", compute, key=classes_key)